@@ -1,7 +1,21 @@
 import abc
 import logging
 
+
 class BaseInstaller(abc.ABC):
+    """
+    DEPENDS_ON: programas (nomes do CLI) que precisam estar instalados antes deste.
+    Etapas que disputam um recurso compartilhado (ver config.py) com outros
+    instaladores são executadas dentro de scheduler.lock(recurso).
+    PACKAGES: pacotes instalados pelo gerenciador de pacotes; na instalação de vários
+    programas, o InstallScheduler os reúne em uma única transação.
+    RELEASE: fonte da versão mais recente do programa (ver releases.py); o
+    InstallScheduler consulta as fontes de todos os programas em paralelo.
+    """
+    DEPENDS_ON = []
+    PACKAGES = []
+    RELEASE = None
+
     def __init__(self, debug=False, version=None):
         self.debug = debug
         self.version = version
@@ -13,6 +27,10 @@ class BaseInstaller(abc.ABC):
         else:
             self.logger.setLevel(logging.INFO)
 
+    def prepare(self):
+        """Preparação necessária antes da transação de pacotes (ex.: habilitar repositórios)."""
+        pass
+
     @abc.abstractmethod
     def install(self):
         """Realiza a instalação e as configurações pós-instalação."""
@@ -23,6 +41,41 @@ class BaseInstaller(abc.ABC):
         """Realiza a atualização do programa ou informa que não é suportado."""
         pass
 
+    def installed_info(self):
+        """
+        Versão e artefatos (files, symlinks, packages) registrados no estado de
+        instalação (ver state.py) após uma ação bem-sucedida, ou None se a ação não
+        alterou o que está registrado.
+        """
+        return {"packages": self.PACKAGES}
+
+    def plan(self):
+        """
+        Etapas que install() executaria (ver planner.py), sem executá-las. Por padrão, a
+        transação dos PACKAGES e o download do RELEASE.
+        """
+        from planner import PackageTransaction, release_download
+        steps = [PackageTransaction(tuple(self.PACKAGES))] if self.PACKAGES else []
+        if self.RELEASE is not None:
+            steps.append(release_download(self.RELEASE)[0])
+        return steps
+
+    def bundle(self):
+        """
+        Copia para o bundle em uso (ver bundle.py) o que install() baixa: os PACKAGES e o
+        arquivo do RELEASE. Instaladores com outros downloads estendem este método.
+        """
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        self.prepare()
+        get_bundle().add_packages(self.PACKAGES)
+        if self.RELEASE is not None:
+            get_bundle().add_release(self.RELEASE)
+
+    def rollback(self):
+        """Reativa a versão anterior, quando o programa mantém versões lado a lado."""
+        self.logger.info("Rollback não suportado para %s.", self.__class__.__name__)
+
     @abc.abstractmethod
     def uninstall(self):
         """
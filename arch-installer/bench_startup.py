@@ -0,0 +1,44 @@
+"""
+Mede o tempo de inicialização do CLI executando repetidamente um comando que não faz
+alterações no sistema. Uso:
+
+    python bench_startup.py                       # cli.py com o Python atual
+    python bench_startup.py dist/arch-installer   # executável do PyInstaller
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_ARGS = ["-a", "status", "-p", "filezilla"]
+
+
+def measure(command, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização do CLI")
+    parser.add_argument("executable", nargs="?", help="Executável a medir (padrão: cli.py)")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Número de execuções (padrão: 10)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Argumentos do CLI")
+    args = parser.parse_args()
+
+    command = [args.executable] if args.executable else [sys.executable, "cli.py"]
+    command += args.args or DEFAULT_ARGS
+
+    measure(command, 1)
+    timings = measure(command, args.runs)
+    print(f"{' '.join(command)}")
+    print(f"mediana: {statistics.median(timings) * 1000:.1f} ms  "
+          f"mínimo: {min(timings) * 1000:.1f} ms  máximo: {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
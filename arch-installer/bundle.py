@@ -0,0 +1,224 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import subprocess
+import threading
+
+from config import PACMAN_DB
+from download_cache import DownloadCache, DownloadError, use_cache
+from mise_query import mise_command
+from packages import sync_database, use_bundle as use_package_bundle
+from releases import ReleaseResolver, use_resolver
+from scheduler import lock
+
+# Diretório de instalação das ferramentas do mise, o mesmo usado pelo próprio mise.
+MISE_DATA_DIR = os.environ.get(
+    "MISE_DATA_DIR",
+    os.path.join(os.environ.get("XDG_DATA_HOME", "~/.local/share"), "mise")
+)
+
+
+class Bundle:
+    """
+    Bundle offline: tudo o que a instalação de um conjunto de programas baixa, em um
+    diretório que pode ser copiado para máquinas sem acesso à rede.
+
+        cache/           cache de downloads (ver download_cache.py) e releases.json
+        packages/        arquivos dos pacotes ('pacman -Sw') e das suas dependências
+        repos/           espelhos ('git clone --mirror') dos repositórios de templates
+        mise/installs/   ferramentas instaladas pelo mise (node, python, ...)
+        mise/bin/mise    binário do mise usado para instalar as ferramentas
+        manifest.json    programas, pacotes, repositórios, ferramentas e downloads
+
+    O bundle é criado pela ação 'bundle' de cada instalador e usado com '--from-bundle'.
+    Os pacotes baixados são os que faltam na máquina que cria o bundle; por isso ele
+    deve ser criado em um sistema base equivalente ao das máquinas de destino (por
+    exemplo, no contêiner do Dockerfile). Pacotes do AUR não são incluídos.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.packages_dir = os.path.join(self.root, "packages")
+        self.repos_dir = os.path.join(self.root, "repos")
+        self.mise_dir = os.path.join(self.root, "mise")
+        self.mise_path = os.path.join(self.mise_dir, "bin", "mise")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+
+        self.manifest = {"programs": [], "packages": {}, "repositories": {}, "mise_tools": {}, "downloads": []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest.update(json.load(f))
+
+    def create(self, programs):
+        """Prepara o diretório para receber os arquivos de 'programs' e passa a usá-lo."""
+        for directory in (self.cache_dir, self.packages_dir, self.repos_dir, self.mise_dir):
+            os.makedirs(directory, exist_ok=True)
+        self.manifest["programs"] = sorted(set(self.manifest["programs"]) | set(programs))
+        use_bundle(self, offline=False)
+
+    def write_manifest(self):
+        index = {}
+        if os.path.exists(os.path.join(self.cache_dir, "index.json")):
+            with open(os.path.join(self.cache_dir, "index.json"), "r") as f:
+                index = json.load(f)
+        self.manifest["downloads"] = sorted(
+            ({"url": entry["url"], "version": entry["version"], "sha256": entry["sha256"], "size": entry["size"]}
+             for entry in index.values()),
+            key=lambda download: download["url"]
+        )
+        self.manifest["created_at"] = time.time()
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    # Criação do bundle
+
+    def add_download(self, url, **kwargs):
+        """Baixa 'url' para o cache do bundle. Aceita os mesmos argumentos de DownloadCache.fetch()."""
+        return self.cache.fetch(url, **kwargs)
+
+    def add_release(self, source):
+        """Resolve a versão mais recente de 'source' (ver releases.py) e baixa o arquivo."""
+        release = self.resolver.resolve(source)
+        self.add_download(
+            release["url"],
+            version=release["version"],
+            checksum=release["checksum"],
+            checksum_url=release["checksum_url"],
+            algorithm=release["algorithm"],
+            size=release["size"]
+        )
+        return release
+
+    def add_packages(self, names):
+        """
+        Baixa os pacotes e as dependências que faltam na máquina ('pacman -Sw'), sem
+        instalá-los. Pacotes que não estão nos repositórios (AUR) são ignorados.
+        """
+        names = [name for name in dict.fromkeys(names) if name not in self.manifest["packages"]]
+        if not names:
+            return
+        sync_database()
+
+        files = {}
+        for name in names:
+            result = subprocess.run(["pacman", "-Sp", "--print-format", "%f", name], capture_output=True, text=True)
+            if result.returncode != 0:
+                self.logger.warning("Pacote %s não encontrado nos repositórios; não será incluído no bundle.", name)
+                continue
+            files[name] = result.stdout.split()
+
+        if files:
+            self.logger.info("Baixando pacotes: %s", " ".join(files))
+            with lock(PACMAN_DB):
+                subprocess.run(
+                    ["sudo", "pacman", "-Sw", "--noconfirm", "--cachedir", self.packages_dir] + list(files), check=True
+                )
+        with self._lock:
+            self.manifest["packages"].update(files)
+
+    def add_repository(self, url):
+        """Cria (ou atualiza) um espelho do repositório git 'url' no bundle."""
+        path = os.path.join(self.repos_dir, re.sub(r"[^\w.-]+", "_", url) + ".git")
+        if os.path.isdir(path):
+            subprocess.run(["git", "-C", path, "remote", "update", "--prune"], check=True)
+        else:
+            subprocess.run(["git", "clone", "--mirror", url, path], check=True)
+        with self._lock:
+            self.manifest["repositories"][url] = os.path.relpath(path, self.root)
+
+    def add_mise(self, source):
+        """
+        Baixa o release do mise de 'source' e o deixa executável no bundle, para instalar
+        as ferramentas em máquinas que ainda não têm o mise (ver add_mise_tools()).
+        """
+        release = self.add_release(source)
+        path = self.cache.fetch(release["url"], version=release["version"])
+        os.makedirs(os.path.dirname(self.mise_path), exist_ok=True)
+        shutil.copyfile(path, self.mise_path)
+        os.chmod(self.mise_path, 0o755)
+        return release
+
+    def add_mise_tools(self, tools):
+        """
+        Instala as ferramentas {ferramenta: versão} do mise dentro do bundle, com o mise da
+        máquina ou, se não houver, com o baixado por add_mise(). Lança DownloadError se
+        nenhum estiver disponível.
+        """
+        command = shutil.which(mise_command()) or (self.mise_path if os.path.exists(self.mise_path) else None)
+        if command is None:
+            raise DownloadError("mise não encontrado: instale o mise ou inclua o programa 'mise' no bundle")
+        args = [f"{tool}@{version}" for tool, version in tools.items()]
+        subprocess.run([command, "install"] + args, check=True, env=dict(os.environ, MISE_DATA_DIR=self.mise_dir))
+        with self._lock:
+            self.manifest["mise_tools"].update(tools)
+
+    # Instalação a partir do bundle
+
+    def package_files(self, names):
+        """
+        Retorna os arquivos do bundle com os pacotes 'names' e as suas dependências.
+        Lança DownloadError se algum pacote não estiver no bundle.
+        """
+        missing = [name for name in names if name not in self.manifest["packages"]]
+        if missing:
+            raise DownloadError(f"Pacotes ausentes no bundle {self.root}: {' '.join(missing)}")
+        files = dict.fromkeys(file for name in names for file in self.manifest["packages"][name])
+        return [os.path.join(self.packages_dir, file) for file in files]
+
+    def repository(self, url):
+        """
+        Caminho do espelho local de 'url'. Lança DownloadError se não estiver no bundle.
+        """
+        if url not in self.manifest["repositories"]:
+            raise DownloadError(f"Repositório {url} ausente no bundle {self.root}")
+        return os.path.join(self.root, self.manifest["repositories"][url])
+
+    def restore_mise_tools(self, tools):
+        """
+        Copia as ferramentas {ferramenta: versão} do bundle para o diretório do mise.
+        Lança DownloadError se alguma não estiver no bundle.
+        """
+        for tool, version in tools.items():
+            source = os.path.join(self.mise_dir, "installs", tool, version)
+            if not os.path.isdir(source):
+                raise DownloadError(f"{tool}@{version} ausente no bundle {self.root}")
+            destination = os.path.join(os.path.expanduser(MISE_DATA_DIR), "installs", tool, version)
+            shutil.copytree(source, destination, symlinks=True, dirs_exist_ok=True)
+            self.logger.debug("%s@%s copiado para %s.", tool, version, destination)
+
+
+_bundle = None
+
+
+def use_bundle(bundle, offline=True):
+    """
+    Passa a usar 'bundle' em todos os instaladores do processo: os downloads e as
+    versões vêm do seu cache e os pacotes dos seus arquivos. Com offline=False (criação
+    do bundle), o cache e o resolvedor do bundle acessam a rede normalmente.
+    """
+    global _bundle
+    _bundle = bundle
+    bundle.cache = DownloadCache(bundle.cache_dir, max_size=float("inf"), offline=offline)
+    bundle.resolver = ReleaseResolver(bundle.cache_dir, offline=offline)
+    use_cache(bundle.cache)
+    use_resolver(bundle.resolver)
+    if offline:
+        use_package_bundle(bundle)
+
+
+def get_bundle():
+    """Retorna o bundle em uso ou None."""
+    return _bundle
+
+
+def repository_url(url):
+    """URL a ser clonada: o espelho local de 'url' quando há um bundle em uso."""
+    return _bundle.repository(url) if _bundle is not None else url
@@ -1,16 +1,13 @@
 import argparse
 import logging
+import subprocess
+import sys
+import time
 
-from modules.chrome import ChromeInstaller
-from modules.jetbrains import JetbrainsInstaller
-from modules.filezilla import FilezillaInstaller
-from modules.tomcat import TomcatInstaller
-from modules.wine import WineInstaller
-from modules.postman import PostmanInstaller
-from modules.nvim import NvimInstaller
-from modules.nvim_nvchad import NvChadInstaller
-from modules.nvim_astrovim import AstroVimInstaller
-from modules.docker import DockerInstaller
+from config import PROFILES
+from registry import INSTALLERS, InstallerRegistry
+from scheduler import InstallScheduler
+from state import InstalledState
 
 
 def main():
@@ -19,17 +16,42 @@ def main():
     )
     parser.add_argument(
         "-p", "--program",
-        required=True,
-        choices=["chrome", "jetbrains", "filezilla",
-                 "tomcat", "wine", "postman", "nvim", "nvchad", "astrovim", "docker"],
-        help="Programa a ser gerenciado"
+        nargs="+",
+        default=[],
+        choices=list(INSTALLERS),
+        help="Programa(s) a ser(em) gerenciado(s)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        help="Perfil com um conjunto de programas (definido em config.py)"
     )
     parser.add_argument(
         "-a", "--action",
         required=True,
-        choices=["install", "update", "uninstall"],
+        choices=["install", "update", "uninstall", "rollback", "status", "bundle"],
         help="Ação a ser executada"
     )
+    parser.add_argument(
+        "--bundle-dir",
+        help="Diretório do bundle offline criado pela ação 'bundle'"
+    )
+    parser.add_argument(
+        "--from-bundle",
+        metavar="BUNDLE_DIR",
+        help="Instala usando apenas os arquivos de um bundle offline, sem acesso à rede"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=4,
+        help="Número máximo de programas executados em paralelo (padrão: 4)"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Apenas exibe as etapas da instalação, com estimativas de download e tempo"
+    )
     parser.add_argument(
         "-d", "--debug",
         action="store_true",
@@ -41,39 +63,82 @@ def main():
     # )
     args = parser.parse_args()
 
+    programs = list(args.program) + (PROFILES[args.profile] if args.profile else [])
+    if not programs and args.action != "status":
+        parser.error("informe ao menos um programa (-p) ou um perfil (--profile)")
+    if args.jobs < 1:
+        parser.error("--jobs deve ser maior ou igual a 1")
+    if args.action == "bundle" and not args.bundle_dir:
+        parser.error("a ação 'bundle' requer --bundle-dir")
+    if args.from_bundle and args.action != "install":
+        parser.error("--from-bundle só pode ser usado com a ação 'install'")
+    if args.plan and args.action != "install":
+        parser.error("--plan só pode ser usado com a ação 'install'")
+
     logging.basicConfig(
         format='[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s',
         level=logging.DEBUG if args.debug else logging.INFO
     )
 
-    installers = {
-        "chrome": ChromeInstaller,
-        "jetbrains": JetbrainsInstaller,
-        "filezilla": FilezillaInstaller,
-        "tomcat": TomcatInstaller,
-        "wine": WineInstaller,
-        "postman": PostmanInstaller,
-        "nvim": NvimInstaller,
-        "nvchad": NvChadInstaller,
-        "astrovim": AstroVimInstaller,
-        "docker": DockerInstaller
-    }
-
-    installer_class = installers.get(args.program)
-    if installer_class is None:
-        print("Programa não encontrado.")
+    installers = InstallerRegistry()
+
+    state = InstalledState()
+    if args.action == "status":
+        print_status(state, installers, list(dict.fromkeys(programs)) or list(installers))
+        return
+
+    if args.action == "bundle" or args.from_bundle:
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import Bundle, use_bundle
+        bundle = Bundle(args.bundle_dir or args.from_bundle)
+        if args.action == "bundle":
+            bundle.create(programs)
+            state = None
+        else:
+            use_bundle(bundle)
+
+    scheduler = InstallScheduler(installers, args.action, debug=args.debug, max_workers=args.jobs, state=state)
+    try:
+        graph = scheduler.plan(programs)
+    except ValueError as e:
+        print(e)
+        return
+
+    if args.plan:
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from download_cache import DownloadError
+        from planner import Planner, print_plan
+        try:
+            conflicts = print_plan(Planner(installers, graph, debug=args.debug))
+        except DownloadError as e:
+            print(e)
+            sys.exit(1)
+        if conflicts:
+            sys.exit(1)
         return
 
-    installer = installer_class(debug=args.debug)
+    # Com execuções em paralelo, a senha do sudo é solicitada uma única vez antes,
+    # evitando que vários instaladores peçam a senha ao mesmo tempo no terminal.
+    if len(graph) > 1 and args.jobs > 1:
+        subprocess.run(["sudo", "-v"], check=True)
+
+    results = scheduler.run(programs)
+    if args.action == "bundle":
+        bundle.write_manifest()
+    if len(results) > 1:
+        for name, status in results.items():
+            print(f"{name}: {status}")
+    if any(status != "ok" for status in results.values()):
+        sys.exit(1)
+
 
-    if args.action == "install":
-        installer.install()
-    elif args.action == "update":
-        installer.update()
-    elif args.action == "uninstall":
-        installer.uninstall()
-    else:
-        print("Ação inválida.")
+def print_status(state, installers, programs):
+    print(f"{'programa':<10} {'situação':<11} {'versão':<14} {'atualizado em':<16}")
+    for name, situation, version, updated_at, missing in state.status(installers, programs):
+        updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(updated_at)) if updated_at else "-"
+        print(f"{name:<10} {situation:<11} {version or '-':<14} {updated:<16}")
+        for artifact in missing:
+            print(f"    ausente: {artifact}")
 
 
 if __name__ == "__main__":
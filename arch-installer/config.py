@@ -1,4 +1,6 @@
+import os
 import shutil
+import functools
 
 def get_archlinux_package_manager():
     for pm in ["paru", "yay", "pacman"]:
@@ -6,4 +8,49 @@ def get_archlinux_package_manager():
             return pm
     raise EnvironmentError("Nenhum gerenciador de pacotes suportado encontrado!")
 
-PACKAGE_MANAGER = get_archlinux_package_manager()
+@functools.lru_cache(maxsize=None)
+def package_manager():
+    """
+    Gerenciador de pacotes (paru, yay ou pacman), detectado no primeiro uso e não na
+    importação, para que ações que não instalam pacotes não pesquisem o PATH.
+    Lança EnvironmentError se nenhum for encontrado.
+    """
+    return get_archlinux_package_manager()
+
+# Recursos compartilhados entre instaladores. As etapas que usam o mesmo recurso
+# (ver scheduler.lock()) nunca são executadas ao mesmo tempo.
+PACMAN_DB = "pacman-db"
+USR_LOCAL_BIN = "/usr/local/bin"
+NVIM_CONFIG = "~/.config/nvim"
+TERMINAL = "terminal"
+
+# Perfis de instalação: conjuntos de programas instalados com '--profile'.
+PROFILES = {
+    "dev": ["jetbrains", "docker", "postman", "astrovim", "chrome"],
+    "web": ["chrome", "postman", "filezilla"],
+    "nvim": ["astrovim"],
+}
+
+# Cache de downloads compartilhado pelos instaladores (ver download_cache.py). Pode ser
+# apontado para um volume compartilhado entre máquinas ou contêineres com a variável
+# ARCH_INSTALLER_CACHE_DIR.
+CACHE_DIR = os.environ.get(
+    "ARCH_INSTALLER_CACHE_DIR",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", "~/.cache"), "arch-installer")
+)
+CACHE_MAX_SIZE = 2 * 1024 ** 3
+
+# Conexões simultâneas usadas para baixar arquivos grandes (ver downloader.py).
+DOWNLOAD_CONNECTIONS = int(os.environ.get("ARCH_INSTALLER_CONNECTIONS", "8"))
+
+# Instalações versionadas (ver versions.py): diretório base das versões mantidas lado a
+# lado e quantidade de versões preservadas (a atual e as anteriores, para rollback).
+VERSIONS_DIR = "~/.local/share/arch-installer"
+KEEP_VERSIONS = 2
+
+# Banco de dados com o estado dos programas instalados (ver state.py).
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME", "~/.local/state"), "arch-installer")
+
+# Tempo, em segundos, durante o qual a versão mais recente consultada de cada programa é
+# reaproveitada sem nova consulta (ver releases.py).
+RELEASES_TTL = int(os.environ.get("ARCH_INSTALLER_RELEASES_TTL", str(6 * 3600)))
@@ -0,0 +1,369 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import shutil
+import tarfile
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import requests
+
+from config import CACHE_DIR, CACHE_MAX_SIZE
+from downloader import Downloader, extract_tar
+
+
+class DownloadError(Exception):
+    """Falha ao baixar ou validar um arquivo."""
+
+
+class DownloadCache:
+    """
+    Cache de downloads endereçado por conteúdo.
+
+    Os arquivos são gravados em 'blobs/<sha256>' e o índice (index.json) associa cada
+    par (URL, versão) ao blob correspondente, junto com ETag, Last-Modified e os
+    checksums conhecidos. Assim:
+
+    - URLs de uma versão fixa (version=...) ou com checksum conhecido são servidas do
+      cache sem nenhum acesso à rede;
+    - URLs "latest" são revalidadas com uma requisição condicional (If-None-Match /
+      If-Modified-Since) e só baixadas novamente quando o servidor não responde 304;
+    - URLs diferentes com o mesmo conteúdo compartilham o mesmo blob.
+
+    O índice é protegido por um lock de arquivo (flock), de modo que o mesmo diretório
+    pode ser compartilhado entre processos, por exemplo como volume de vários
+    contêineres. Quando o tamanho total passa de 'max_size' bytes, os blobs usados há
+    mais tempo são removidos (LRU).
+
+    offline: o cache não acessa a rede; toda entrada existente é considerada válida e
+    URLs ausentes lançam DownloadError (usado com bundles, ver bundle.py).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_size=CACHE_MAX_SIZE, offline=False):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.offline = offline
+        self.blobs_dir = os.path.join(self.cache_dir, "blobs")
+        self.staging_dir = os.path.join(self.cache_dir, "staging")
+        self.locks_dir = os.path.join(self.cache_dir, "locks")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.max_size = max_size
+        self.session = requests.Session()
+        self.downloader = Downloader(self.session)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.locks_dir, exist_ok=True)
+
+    @staticmethod
+    def key(url, version=None):
+        return hashlib.sha256(f"{url}\n{version or ''}".encode()).hexdigest()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, sha256)
+
+    def part_path(self, key):
+        return os.path.join(self.blobs_dir, f"{key}.part")
+
+    def path_for(self, url, version=None):
+        """
+        Caminho do arquivo de 'url' no cache, sem acessar a rede: o blob, se já estiver no
+        cache, ou o arquivo parcial em que será baixado.
+        """
+        entry = self.lookup(url, version)
+        if entry:
+            return self.blob_path(entry["sha256"])
+        return self.part_path(self.key(url, version))
+
+    @contextmanager
+    def _index(self):
+        """
+        Abre o índice com lock exclusivo (entre threads e processos) e o grava ao sair.
+        """
+        with self._lock, open(os.path.join(self.cache_dir, "index.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = {}
+                if os.path.exists(self.index_path):
+                    with open(self.index_path, "r") as f:
+                        index = json.load(f)
+                yield index
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(index, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.index_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def new_staging(self):
+        """
+        Cria um diretório de staging vazio dentro do cache.
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.staging_dir)
+        os.chmod(staging, 0o755)
+        return staging
+
+    def extract(self, url, strip_components=0, **kwargs):
+        """
+        Extrai o arquivo tar de 'url' em um novo diretório de staging e retorna o seu
+        caminho; cabe ao instalador movê-lo para o destino final. Aceita os mesmos
+        argumentos de fetch().
+
+        Quando o arquivo precisa ser baixado com uma única conexão, a extração acontece
+        durante o download, a partir do próprio fluxo HTTP, enquanto o conteúdo é gravado
+        no cache e os checksums são calculados. Se o checksum não conferir, o staging é
+        removido e DownloadError é lançado.
+        """
+        staging = self.new_staging()
+        streamed = []
+
+        def sink(fileobj):
+            extract_tar(fileobj, staging, strip_components)
+            streamed.append(True)
+
+        try:
+            path = self.fetch(url, sink=sink, **kwargs)
+            if not streamed:
+                with open(path, "rb") as f:
+                    extract_tar(f, staging, strip_components)
+        except tarfile.TarError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise DownloadError(f"Arquivo inválido em {url}: {e}") from e
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return staging
+
+    def extract_blob(self, path, strip_components=0):
+        """
+        Extrai em um novo diretório de staging um arquivo já baixado por fetch().
+        """
+        staging = self.new_staging()
+        try:
+            with open(path, "rb") as f:
+                extract_tar(f, staging, strip_components)
+        except tarfile.TarError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise DownloadError(f"Arquivo inválido em {path}: {e}") from e
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return staging
+
+    def fetch(self, url, version=None, checksum=None, checksum_url=None, algorithm="sha256", size=None, sink=None):
+        """
+        Retorna o caminho do arquivo de 'url' no cache, baixando-o se necessário.
+
+        version: versão resolvida do arquivo; entradas com versão são consideradas imutáveis.
+        checksum / checksum_url: checksum publicado (ou URL de um arquivo no formato do
+        'sha256sum') calculado com 'algorithm'. A URL só é consultada quando a entrada
+        não está no cache; se outro blob tiver o mesmo checksum, ele é reaproveitado.
+        size: tamanho esperado em bytes.
+        sink: ver Downloader.download(); só é chamado quando há download.
+
+        Lança DownloadError se o download falhar ou o conteúdo não conferir.
+        """
+        key = self.key(url, version)
+        with self._index() as index:
+            entry = index.get(key)
+            if entry and not os.path.exists(self.blob_path(entry["sha256"])):
+                del index[key]
+                entry = None
+            if entry and (self.offline or self._is_fresh(entry, version, checksum, algorithm)):
+                entry["last_used"] = time.time()
+                self.logger.debug("Cache hit: %s", url)
+                return self.blob_path(entry["sha256"])
+        if self.offline:
+            raise DownloadError(f"{url} não está disponível no cache offline {self.cache_dir}")
+
+        try:
+            if checksum is None and checksum_url:
+                checksum = self.fetch_checksum(checksum_url)
+        except requests.exceptions.RequestException as e:
+            raise DownloadError(f"Erro ao baixar {checksum_url}: {e}") from e
+
+        if checksum is not None:
+            # Outra URL (ou versão) com o mesmo conteúdo já pode estar no cache.
+            with self._index() as index:
+                for other in list(index.values()):
+                    if other["checksums"].get(algorithm) == checksum.lower() \
+                            and os.path.exists(self.blob_path(other["sha256"])):
+                        index[key] = dict(other, url=url, version=version, last_used=time.time())
+                        self.logger.debug("Cache hit por checksum: %s", url)
+                        return self.blob_path(other["sha256"])
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        # Downloads interrompidos são retomados a partir de 'blobs/<chave>.part'.
+        part_path = self.part_path(key)
+        with self._part_lock(key):
+            # Outra thread ou processo pode ter baixado o arquivo enquanto este
+            # esperava pelo lock; nesse caso o blob recém-gravado é reaproveitado.
+            with self._index() as index:
+                current = index.get(key)
+                if current and os.path.exists(self.blob_path(current["sha256"])) and (
+                        entry is None or current["sha256"] != entry["sha256"]
+                        or self._is_fresh(current, version, checksum, algorithm)):
+                    current["last_used"] = time.time()
+                    self.logger.debug("Cache hit após aguardar download concorrente: %s", url)
+                    return self.blob_path(current["sha256"])
+
+            try:
+                with self.session.get(url, headers=headers, stream=True, timeout=30) as response:
+                    if response.status_code == 304:
+                        self.logger.debug("Cache revalidado (304): %s", url)
+                        return self._touch(key, entry)
+                    response.raise_for_status()
+
+                    self.logger.info("Baixando %s...", url)
+                    start = time.monotonic()
+                    downloaded, checksums = self.downloader.download(
+                        response, part_path, algorithms=sorted({"sha256", algorithm}), size=size, sink=sink
+                    )
+                    elapsed = time.monotonic() - start
+            except requests.exceptions.RequestException as e:
+                raise DownloadError(f"Erro ao baixar {url}: {e}") from e
+            except ValueError as e:
+                raise DownloadError(str(e)) from e
+            finally:
+                if os.path.exists(part_path + ".json") and not os.path.exists(part_path):
+                    os.remove(part_path + ".json")
+
+            try:
+                if size is not None and downloaded != size:
+                    raise DownloadError(f"Tamanho de {url} não confere: {downloaded} != {size} bytes")
+                if checksum is not None and checksums[algorithm] != checksum.lower():
+                    raise DownloadError(f"Checksum {algorithm} de {url} não confere")
+                sha256 = checksums["sha256"]
+                os.replace(part_path, self.blob_path(sha256))
+            finally:
+                # O arquivo parcial só é mantido para retomar downloads interrompidos.
+                for path in (part_path, part_path + ".json"):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            # O índice é atualizado ainda com o lock, para que quem o aguarda encontre a entrada.
+            with self._index() as index:
+                index[key] = {
+                    "url": url,
+                    "version": version,
+                    "sha256": sha256,
+                    "checksums": checksums,
+                    "size": downloaded,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "last_used": time.time(),
+                    "throughput": downloaded / elapsed if elapsed else None,
+                }
+                self._evict(index, keep=sha256)
+        return self.blob_path(sha256)
+
+    def lookup(self, url, version=None):
+        """
+        Retorna a entrada do índice de 'url' (com "size" e "throughput" do download),
+        sem acessar a rede, ou None se o arquivo não estiver no cache.
+        """
+        with self._index() as index:
+            entry = index.get(self.key(url, version))
+            if entry and os.path.exists(self.blob_path(entry["sha256"])):
+                return dict(entry)
+        return None
+
+    def throughputs(self):
+        """Vazões (bytes/s) registradas nos downloads do cache."""
+        with self._index() as index:
+            return [entry["throughput"] for entry in index.values() if entry.get("throughput")]
+
+    def _is_fresh(self, entry, version, checksum, algorithm):
+        if checksum is not None:
+            return entry["checksums"].get(algorithm) == checksum.lower()
+        return version is not None
+
+    def _touch(self, key, entry):
+        with self._index() as index:
+            index[key] = dict(entry, last_used=time.time())
+        return self.blob_path(entry["sha256"])
+
+    @contextmanager
+    def _part_lock(self, key):
+        """
+        Impede que duas threads ou processos baixem o mesmo arquivo parcial ao mesmo tempo.
+
+        O arquivo de lock fica em 'locks/', fora dos blobs, e é removido ao final do
+        download. Quem esperava pelo lock de um arquivo já removido tenta novamente com
+        o arquivo atual.
+        """
+        lock_path = os.path.join(self.locks_dir, f"{key}.lock")
+        while True:
+            lock_file = open(lock_path, "w")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.samestat(os.fstat(lock_file.fileno()), os.stat(lock_path)):
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+            lock_file.close()
+
+    def fetch_checksum(self, checksum_url):
+        """
+        Baixa um arquivo de checksum no formato '<hash>  <arquivo>' e retorna o hash.
+        """
+        response = self.session.get(checksum_url, timeout=30)
+        response.raise_for_status()
+        return response.text.split()[0].lower()
+
+    def _evict(self, index, keep=None):
+        """
+        Remove os blobs usados há mais tempo até o cache caber em 'max_size'.
+        """
+        blobs = {}
+        for key, entry in index.items():
+            blob = blobs.setdefault(entry["sha256"], {"size": entry["size"], "last_used": 0, "keys": []})
+            blob["last_used"] = max(blob["last_used"], entry["last_used"])
+            blob["keys"].append(key)
+
+        total = sum(blob["size"] for blob in blobs.values())
+        for sha256, blob in sorted(blobs.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+            for key in blob["keys"]:
+                del index[key]
+            if os.path.exists(self.blob_path(sha256)):
+                os.remove(self.blob_path(sha256))
+            total -= blob["size"]
+            self.logger.debug("Blob %s removido do cache.", sha256)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Retorna a instância do cache compartilhada pelos instaladores do processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DownloadCache()
+        return _cache
+
+
+def use_cache(cache):
+    """Substitui a instância compartilhada (por exemplo, pelo cache de um bundle)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,297 @@
+import os
+import json
+import tarfile
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import DOWNLOAD_CONNECTIONS
+
+CHUNK_SIZE = 1024 * 1024
+
+# Arquivos menores que 2 * SEGMENT_MIN_SIZE são baixados com uma única conexão.
+SEGMENT_MIN_SIZE = 8 * 1024 * 1024
+
+# Intervalo mínimo, em segundos, entre dois registros de progresso do mesmo download.
+PROGRESS_INTERVAL = 2.0
+
+SEGMENT_RETRIES = 3
+
+# Filtro de extração do tarfile equivalente ao 'tar' do GNU: remove '/' inicial, recusa
+# arquivos fora do destino e limpa bits setuid/setgid. Ausente em versões antigas do Python.
+EXTRACT_ARGS = {"filter": "tar"} if hasattr(tarfile, "tar_filter") else {}
+
+
+def extract_tar(fileobj, dest, strip_components=0):
+    """
+    Extrai um arquivo tar (compactado ou não) lido sequencialmente de 'fileobj' em
+    'dest', removendo os primeiros 'strip_components' níveis de cada caminho, como o
+    '--strip-components' do tar.
+    """
+    def strip(name):
+        parts = [part for part in name.split("/") if part not in ("", ".")]
+        return "/".join(parts[strip_components:])
+
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            member.name = strip(member.name)
+            if not member.name:
+                continue
+            if member.islnk():
+                member.linkname = strip(member.linkname)
+            archive.extract(member, dest, **EXTRACT_ARGS)
+
+
+class StreamReader:
+    """
+    Objeto de leitura sobre os blocos de uma resposta HTTP. Cada bloco é entregue a
+    'on_chunk' (gravação no cache, checksums, progresso) antes de ser consumido.
+    """
+
+    def __init__(self, chunks, on_chunk):
+        self.chunks = chunks
+        self.on_chunk = on_chunk
+        self.chunk = b""
+        self.offset = 0
+
+    def read(self, size=-1):
+        parts = []
+        while size:
+            if self.offset >= len(self.chunk):
+                self.chunk = next(self.chunks, b"")
+                self.offset = 0
+                if not self.chunk:
+                    break
+                self.on_chunk(self.chunk)
+            end = len(self.chunk) if size < 0 else self.offset + size
+            part = self.chunk[self.offset:end]
+            self.offset += len(part)
+            parts.append(part)
+            if size > 0:
+                size -= len(part)
+        return b"".join(parts)
+
+    def drain(self):
+        while self.read(CHUNK_SIZE):
+            pass
+
+
+class Progress:
+    """
+    Acompanha os bytes recebidos por todas as conexões de um download e registra
+    periodicamente o percentual e a vazão.
+    """
+
+    def __init__(self, logger, name, total, done=0):
+        self.logger = logger
+        self.name = name
+        self.total = total
+        self.done = done
+        self.received = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+        self.lock = threading.Lock()
+
+    def update(self, count):
+        with self.lock:
+            self.done += count
+            self.received += count
+            now = time.monotonic()
+            if now - self.last_report < PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+        self.report()
+
+    def throughput(self):
+        elapsed = time.monotonic() - self.start
+        return self.received / elapsed if elapsed else 0.0
+
+    def report(self):
+        if self.total:
+            self.logger.info(
+                "%s: %.0f%% (%.1f/%.1f MB, %.1f MB/s)",
+                self.name, 100 * self.done / self.total, self.done / 1e6, self.total / 1e6, self.throughput() / 1e6
+            )
+        else:
+            self.logger.info("%s: %.1f MB (%.1f MB/s)", self.name, self.done / 1e6, self.throughput() / 1e6)
+
+
+class Downloader:
+    """
+    Baixa um arquivo HTTP em 'part_path', com várias conexões e retomada.
+
+    Quando o servidor aceita requisições 'Range' e informa o tamanho do arquivo, o
+    download é dividido em até 'connections' segmentos baixados em paralelo e gravados
+    diretamente na posição final do arquivo. O estado de cada segmento fica em
+    '<part_path>.json', junto com o ETag/Last-Modified da resposta; se o download for
+    interrompido, a próxima execução retoma apenas os bytes que faltam, desde que o
+    arquivo no servidor não tenha mudado.
+    """
+
+    def __init__(self, session, connections=DOWNLOAD_CONNECTIONS):
+        self.session = session
+        self.connections = connections
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def download(self, response, part_path, algorithms=("sha256",), size=None, sink=None):
+        """
+        Baixa o conteúdo de 'response' (uma resposta 200 aberta com stream=True) em
+        'part_path'. Retorna (bytes baixados, {algoritmo: checksum}).
+
+        sink: função chamada com um objeto de leitura sobre o conteúdo à medida que ele
+        é baixado (por exemplo, para extrair o arquivo durante o download). Só é chamada
+        em downloads com uma única conexão.
+
+        Lança requests.exceptions.RequestException em falhas de rede; o arquivo parcial
+        é mantido para ser retomado. Lança ValueError se o tamanho informado pelo
+        servidor não confere com 'size'.
+        """
+        url = response.url
+        total = int(response.headers["Content-Length"]) if "Content-Length" in response.headers else None
+        if size is not None and total is not None and total != size:
+            raise ValueError(f"Tamanho de {url} não confere: {total} != {size} bytes")
+
+        validator = {
+            "url": url,
+            "size": total,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        state = self._load_state(part_path, validator)
+        name = os.path.basename(url.split("?")[0]) or url
+        ranged = response.headers.get("Accept-Ranges") == "bytes" and total is not None
+
+        if ranged and (state or (total >= 2 * SEGMENT_MIN_SIZE and self.connections > 1)):
+            # A resposta inicial é descartada: os segmentos são pedidos com 'Range'.
+            response.close()
+            state = state or dict(validator, segments=self._split(total))
+            progress = Progress(self.logger, name, total, sum(s[2] - s[0] for s in state["segments"]))
+            self._download_segments(url, part_path, state, progress)
+            progress.report()
+            return total, self._hash_file(part_path, algorithms)
+
+        progress = Progress(self.logger, name, total)
+        downloaded, checksums = self._download_stream(response, part_path, algorithms, progress, validator, sink)
+        progress.report()
+        return downloaded, checksums
+
+    def _split(self, total):
+        count = max(min(self.connections, total // SEGMENT_MIN_SIZE), 1)
+        step = -(-total // count)
+        return [[start, min(start + step, total), start] for start in range(0, total, step)]
+
+    def _download_stream(self, response, part_path, algorithms, progress, validator, sink=None):
+        """
+        Download com uma única conexão, calculando os checksums durante a gravação e,
+        se houver 'sink', entregando o conteúdo a ele ao mesmo tempo.
+        """
+        digests = {name: hashlib.new(name) for name in algorithms}
+        downloaded = 0
+        state_path = part_path + ".json"
+        resumable = validator["size"] and response.headers.get("Accept-Ranges") == "bytes"
+        with open(part_path, "wb") as f:
+            def on_chunk(chunk):
+                nonlocal downloaded
+                f.write(chunk)
+                downloaded += len(chunk)
+                for digest in digests.values():
+                    digest.update(chunk)
+                progress.update(len(chunk))
+                if resumable:
+                    self._save_state(state_path, dict(validator, segments=[[0, validator["size"], downloaded]]))
+
+            reader = StreamReader(response.iter_content(CHUNK_SIZE), on_chunk)
+            if sink is not None:
+                sink(reader)
+            # O conteúdo após o fim do arquivo tar (preenchimento) também entra no checksum.
+            reader.drain()
+        return downloaded, {name: digest.hexdigest() for name, digest in digests.items()}
+
+    def _download_segments(self, url, part_path, state, progress):
+        state_path = part_path + ".json"
+        state_lock = threading.Lock()
+        mode = "r+b" if os.path.exists(part_path) else "w+b"
+        with open(part_path, mode) as f:
+            f.truncate(state["size"])
+            fd = f.fileno()
+
+            def fetch_segment(segment):
+                for attempt in range(1, SEGMENT_RETRIES + 1):
+                    if segment[2] >= segment[1]:
+                        return
+                    headers = {"Range": f"bytes={segment[2]}-{segment[1] - 1}"}
+                    if state.get("etag"):
+                        headers["If-Range"] = state["etag"]
+                    try:
+                        with self.session.get(url, headers=headers, stream=True, timeout=30) as response:
+                            if response.status_code != 206:
+                                raise requests.exceptions.HTTPError(
+                                    f"Resposta {response.status_code} para requisição parcial de {url}",
+                                    response=response
+                                )
+                            for chunk in response.iter_content(CHUNK_SIZE):
+                                chunk = chunk[:segment[1] - segment[2]]
+                                os.pwrite(fd, chunk, segment[2])
+                                with state_lock:
+                                    segment[2] += len(chunk)
+                                    self._save_state(state_path, state)
+                                progress.update(len(chunk))
+                                if segment[2] >= segment[1]:
+                                    return
+                    except requests.exceptions.RequestException as e:
+                        if attempt == SEGMENT_RETRIES:
+                            raise
+                        self.logger.debug("Segmento %s-%s de %s falhou (%s), tentando novamente...",
+                                          segment[0], segment[1], url, e)
+
+            pending = [segment for segment in state["segments"] if segment[2] < segment[1]]
+            with ThreadPoolExecutor(max_workers=max(min(self.connections, len(pending)), 1)) as executor:
+                for future in [executor.submit(fetch_segment, segment) for segment in pending]:
+                    future.result()
+
+        if any(segment[2] < segment[1] for segment in state["segments"]):
+            raise requests.exceptions.ConnectionError(f"Download de {url} incompleto")
+
+    def _load_state(self, part_path, validator):
+        """
+        Retorna o estado do download parcial, se existir e corresponder ao mesmo arquivo
+        no servidor. Caso contrário, descarta o arquivo parcial.
+        """
+        state_path = part_path + ".json"
+        state = None
+        if os.path.exists(state_path) and os.path.exists(part_path):
+            with open(state_path, "r") as f:
+                try:
+                    state = json.load(f)
+                except json.JSONDecodeError:
+                    state = None
+        if state and all(state.get(field) == value for field, value in validator.items()) \
+                and (validator["etag"] or validator["last_modified"]):
+            done = sum(segment[2] - segment[0] for segment in state["segments"])
+            self.logger.info("Retomando download de %s (%.1f MB já baixados).", validator["url"], done / 1e6)
+            return state
+
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return None
+
+    @staticmethod
+    def _save_state(state_path, state):
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _hash_file(path, algorithms):
+        digests = {name: hashlib.new(name) for name in algorithms}
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                for digest in digests.values():
+                    digest.update(chunk)
+        return {name: digest.hexdigest() for name, digest in digests.items()}
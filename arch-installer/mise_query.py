@@ -0,0 +1,95 @@
+import os
+import json
+import shutil
+import logging
+import subprocess
+import threading
+
+# Índice das ferramentas do mise, compartilhado por todos os instaladores do processo.
+_lock = threading.Lock()
+_tools = None
+
+MISE_PATH = "~/.local/bin/mise"
+
+logger = logging.getLogger("MiseQuery")
+
+
+def mise_command():
+    """
+    Caminho do mise: ~/.local/bin/mise logo após a instalação (quando o shell ainda não
+    foi reiniciado) ou o encontrado no PATH.
+    """
+    mise_path = os.path.expanduser(MISE_PATH)
+    if os.path.exists(mise_path):
+        return mise_path
+    return shutil.which("mise") or "mise"
+
+
+def _load():
+    global _tools
+    if _tools is None:
+        result = subprocess.run([mise_command(), "ls", "--json"], capture_output=True, text=True, check=True)
+        _tools = json.loads(result.stdout or "{}")
+    return _tools
+
+
+def installed_tools():
+    """
+    Retorna {ferramenta: [versões]} com as versões instaladas de cada ferramenta. O mise
+    é consultado uma única vez ('mise ls --json') até a próxima alteração feita por
+    use_tools() ou uninstall_tool().
+    """
+    with _lock:
+        return {
+            tool: [entry["version"] for entry in entries if entry.get("installed", True)]
+            for tool, entries in _load().items()
+        }
+
+
+def is_tool_installed(tool, version=None):
+    """
+    Indica se a ferramenta (e, se informada, a versão) está instalada. A versão confere
+    com a versão instalada ou com a versão solicitada na configuração (ex.: "22").
+    Lança subprocess.CalledProcessError se o mise falhar.
+    """
+    with _lock:
+        for entry in _load().get(tool, []):
+            if not entry.get("installed", True):
+                continue
+            if version is None or version in (entry.get("version"), entry.get("requested_version")):
+                return True
+        return False
+
+
+def invalidate():
+    global _tools
+    with _lock:
+        _tools = None
+
+
+def use_tools(tools, jobs=None, offline=False):
+    """
+    Instala e ativa globalmente as ferramentas {ferramenta: versão} com uma única
+    chamada 'mise use --global', que instala as ferramentas em paralelo.
+    offline: apenas ativa ferramentas já presentes no diretório do mise (MISE_OFFLINE).
+    Lança subprocess.CalledProcessError em caso de falha.
+    """
+    args = [f"{tool}@{version}" for tool, version in tools.items()]
+    if not args:
+        return
+    command = [mise_command(), "use", "--global"] + (["--jobs", str(jobs)] if jobs else []) + args
+    logger.debug("Executando %s", " ".join(command))
+    try:
+        subprocess.run(command, check=True, env=dict(os.environ, MISE_OFFLINE="1") if offline else None)
+    finally:
+        invalidate()
+
+
+def uninstall_tool(tool, version):
+    """
+    Desinstala uma versão de uma ferramenta. Lança subprocess.CalledProcessError em caso de falha.
+    """
+    try:
+        subprocess.run([mise_command(), "uninstall", f"{tool}@{version}"], check=True)
+    finally:
+        invalidate()
@@ -1,16 +1,19 @@
 import subprocess
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import package_manager, PACMAN_DB
+from scheduler import lock
+from packages import install_packages, remove_packages
 
 
 class ChromeInstaller(BaseInstaller):
-    DEPENDENCIES = ["google-chrome", "noto-fonts-emoji"]
+
+    PACKAGES = ["google-chrome", "noto-fonts-emoji"]
 
     def install(self):
         self.logger.info("Instalando Google Chrome...")
         try:
-            subprocess.run([PACKAGE_MANAGER, "-Sy", "--needed"] + self.DEPENDENCIES + ["--noconfirm"], check=True)
+            install_packages(self.PACKAGES)
             self.logger.info("Google Chrome instalado com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao instalar Google Chrome: %s", e)
@@ -19,8 +22,14 @@ class ChromeInstaller(BaseInstaller):
 
     def update(self):
         self.logger.info("Atualizando Google Chrome...")
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from releases import outdated_packages
         try:
-            subprocess.run([PACKAGE_MANAGER, "-Syu"] + self.DEPENDENCIES + ["--noconfirm"], check=True)
+            if not outdated_packages(self.PACKAGES):
+                self.logger.info("Google Chrome já está na versão mais recente.")
+                return
+            with lock(PACMAN_DB):
+                subprocess.run([package_manager(), "-Syu"] + self.PACKAGES + ["--noconfirm"], check=True)
             self.logger.info("Google Chrome atualizado com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao atualizar Google Chrome: %s", e)
@@ -29,14 +38,7 @@ class ChromeInstaller(BaseInstaller):
     def uninstall(self):
         self.logger.info("Desinstalando Google Chrome...")
         try:
-            for pkg in self.DEPENDENCIES:
-                result = subprocess.run([PACKAGE_MANAGER, "-Qi", pkg], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-                if result.returncode == 0:
-                    subprocess.run([PACKAGE_MANAGER, "-Rns", pkg, "--noconfirm"], check=True)
-                    self.logger.info("%s desinstalado com sucesso.", pkg)
-                else:
-                    self.logger.info("%s não está instalado, ignorando...", pkg)
+            remove_packages(self.PACKAGES)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar Google Chrome: %s", e)
             raise
@@ -1,19 +1,32 @@
 import subprocess
 import os
+import shutil
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import package_manager, PACMAN_DB, VERSIONS_DIR
+from scheduler import lock
+from packages import install_packages, remove_packages
+from download_cache import DownloadError, get_cache
+from versions import VersionedInstall
+from releases import GitHubRelease, get_resolver, outdated_packages
+from planner import Command, Copy, PackageTransaction, Symlink, release_download
 
 class DockerInstaller(BaseInstaller):
-    DOCKER_COMPOSE_URL = "https://github.com/docker/compose/releases/download/v2.33.1/docker-compose-linux-x86_64"
+
+    PACKAGES = ["docker", "docker-buildx"]
+
+    RELEASE = GitHubRelease("docker/compose", "docker-compose-linux-x86_64")
     DOCKER_COMPOSE_PATH = "$HOME/.docker/cli-plugins/docker-compose"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compose_versions = VersionedInstall(os.path.join(VERSIONS_DIR, "docker-compose"))
     
     def install(self):
         self.logger.info("Instalando Docker e dependências...")
         try:
             # Instalar Docker e Buildx
-            subprocess.run([PACKAGE_MANAGER, "-S", "docker"], check=True)
-            subprocess.run([PACKAGE_MANAGER, "-S", "docker-buildx"], check=True)
+            install_packages(self.PACKAGES)
             
             # Adicionar usuário ao grupo docker
             subprocess.run(["sudo", "usermod", "-aG", "docker", os.getenv("USER")], check=True)
@@ -22,36 +35,114 @@ class DockerInstaller(BaseInstaller):
             subprocess.run(["sudo", "systemctl", "start", "docker"], check=True)
             subprocess.run(["sudo", "systemctl", "enable", "docker"], check=True)
             
-            # Criar diretório para plugins do Docker
-            docker_cli_plugins = os.path.expanduser("$HOME/.docker/cli-plugins")
-            os.makedirs(docker_cli_plugins, exist_ok=True)
-            
-            # Baixar Docker Compose
-            subprocess.run(["curl", "-SL", self.DOCKER_COMPOSE_URL, "-o", self.DOCKER_COMPOSE_PATH], check=True)
-            subprocess.run(["chmod", "+x", self.DOCKER_COMPOSE_PATH], check=True)
+            self.deploy_compose()
             
             self.logger.info("Docker instalado com sucesso!")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro durante a instalação do Docker: %s", e)
             self.uninstall()
             raise
 
+    def plan(self):
+        steps = [
+            PackageTransaction(tuple(self.PACKAGES)),
+            Command(("sudo", "usermod", "-aG", "docker", os.getenv("USER") or "$USER")),
+            Command(("sudo", "systemctl", "start", "docker")),
+            Command(("sudo", "systemctl", "enable", "docker")),
+        ]
+        step, version = release_download(self.RELEASE)
+        if self.compose_versions.current() == version:
+            return steps
+        return steps + [
+            step,
+            Copy(step.path, self.compose_versions.path(version, "docker-compose")),
+            Symlink(self.compose_versions.current_link, self.compose_versions.path(version)),
+            Symlink(os.path.expandvars(self.DOCKER_COMPOSE_PATH), self.compose_versions.executable("docker-compose")),
+        ]
+
+    def deploy_compose(self):
+        """
+        Instala a versão mais recente do plugin Docker Compose ao lado da atual e a
+        ativa. Retorna False se essa versão já estiver ativa.
+        """
+        release = get_resolver().resolve(self.RELEASE)
+        version = release["version"]
+        if self.compose_versions.current() == version:
+            self.logger.info("Docker Compose %s já está instalado.", version)
+            return False
+
+        # Baixar Docker Compose
+        # O projeto também publica o SHA-256 de cada binário em '<url>.sha256'.
+        cache = get_cache()
+        compose_path = cache.fetch(
+            release["url"],
+            version=version,
+            checksum=release["checksum"],
+            checksum_url=f"{release['url']}.sha256",
+            size=release["size"]
+        )
+        staging_dir = cache.new_staging()
+        shutil.copyfile(compose_path, os.path.join(staging_dir, "docker-compose"))
+        os.chmod(os.path.join(staging_dir, "docker-compose"), 0o755)
+        self.compose_versions.add(staging_dir, version)
+        self.compose_versions.activate(version)
+
+        # O plugin em ~/.docker/cli-plugins aponta para a versão ativa.
+        docker_compose_path = os.path.expandvars(self.DOCKER_COMPOSE_PATH)
+        executable_path = self.compose_versions.executable("docker-compose")
+        if os.path.realpath(docker_compose_path) != os.path.realpath(executable_path):
+            os.makedirs(os.path.dirname(docker_compose_path), exist_ok=True)
+            subprocess.run(["ln", "-sf", executable_path, docker_compose_path], check=True)
+
+        self.compose_versions.gc()
+        return True
+
     def update(self):
         self.logger.info("Atualizando Docker...")
         try:
-            self.uninstall()
-            self.install()
+            # O pacman substitui os pacotes no lugar; o serviço só é reiniciado se
+            # algum pacote for de fato atualizado.
+            if outdated_packages(self.PACKAGES):
+                before = self.package_versions()
+                with lock(PACMAN_DB):
+                    subprocess.run([package_manager(), "-Syu"] + self.PACKAGES + ["--noconfirm"], check=True)
+                if self.package_versions() != before:
+                    subprocess.run(["sudo", "systemctl", "restart", "docker"], check=True)
+            else:
+                self.logger.info("Pacotes do Docker já estão na versão mais recente.")
+
+            self.deploy_compose()
             self.logger.info("Docker atualizado com sucesso!")
         except Exception as e:
             self.logger.error("Erro ao atualizar o Docker: %s", e)
             raise
 
+    def installed_info(self):
+        return {
+            "version": self.compose_versions.current(),
+            "files": [self.compose_versions.root],
+            "symlinks": [os.path.expandvars(self.DOCKER_COMPOSE_PATH)],
+            "packages": self.PACKAGES,
+        }
+
+    def rollback(self):
+        try:
+            version = self.compose_versions.rollback()
+            self.logger.info("Docker Compose revertido para a versão %s.", version)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            self.logger.error("Erro ao reverter Docker Compose: %s", e)
+            raise
+
+    def package_versions(self):
+        result = subprocess.run([package_manager(), "-Q"] + self.PACKAGES, capture_output=True, text=True)
+        return result.stdout
+
     def uninstall(self):
         self.logger.info("Desinstalando Docker...")
         try:
-            subprocess.run([PACKAGE_MANAGER, "-Rns", "docker"], check=True)
-            subprocess.run([PACKAGE_MANAGER, "-Rns", "docker-buildx"], check=True)
-            subprocess.run(["rm", "-rf", os.path.expanduser("$HOME/.docker")], check=True)
+            remove_packages(self.PACKAGES)
+            subprocess.run(["rm", "-rf", os.path.expandvars("$HOME/.docker")], check=True)
+            self.compose_versions.remove()
             self.logger.info("Docker removido com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar o Docker: %s", e)
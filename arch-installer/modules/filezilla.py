@@ -1,13 +1,18 @@
 import subprocess
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import package_manager, PACMAN_DB
+from scheduler import lock
+from packages import install_packages, is_package_installed, remove_packages
 
 class FilezillaInstaller(BaseInstaller):
+
+    PACKAGES = ["filezilla"]
+
     def install(self):
         self.logger.info("Instalando Filezilla...")
         try:
-            subprocess.run([PACKAGE_MANAGER, "-S", "filezilla", "--noconfirm"], check=True)
+            install_packages(self.PACKAGES)
             self.logger.info("Filezilla instalado com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao instalar Filezilla: %s", e)
@@ -16,8 +21,14 @@ class FilezillaInstaller(BaseInstaller):
 
     def update(self):
         self.logger.info("Atualizando Filezilla...")
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from releases import outdated_packages
         try:
-            subprocess.run([PACKAGE_MANAGER, "-Syu", "filezilla", "--noconfirm"], check=True)
+            if not outdated_packages(self.PACKAGES):
+                self.logger.info("Filezilla já está na versão mais recente.")
+                return
+            with lock(PACMAN_DB):
+                subprocess.run([package_manager(), "-Syu", "filezilla", "--noconfirm"], check=True)
             self.logger.info("Filezilla atualizado com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao atualizar Filezilla: %s", e)
@@ -27,10 +38,8 @@ class FilezillaInstaller(BaseInstaller):
     def uninstall(self):
         self.logger.info("Desinstalando Filezilla...")
         try:
-            result = subprocess.run([PACKAGE_MANAGER, "-Qi", "filezilla"],
-                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            if result.returncode == 0:
-                subprocess.run([PACKAGE_MANAGER, "-Rns", "filezilla", "--noconfirm"], check=True)
+            if is_package_installed("filezilla"):
+                remove_packages(self.PACKAGES)
                 self.logger.info("Filezilla desinstalado com sucesso.")
             else:
                 self.logger.info("Filezilla não está instalado. Nenhuma ação necessária.")
@@ -1,15 +1,28 @@
 import subprocess
 import os
+import re
+import shutil
 
 from base_installer import BaseInstaller
+from download_cache import DownloadError, get_cache
+from releases import GitHubRelease, get_resolver
+from planner import Extract, release_download
 
 class GduInstaller(BaseInstaller):
     GDU_BINARY_PATH = "/usr/bin/gdu"
-    DOWNLOAD_URL = "https://github.com/dundee/gdu/releases/latest/download/gdu_linux_amd64.tgz"
+    RELEASE = GitHubRelease("dundee/gdu", "gdu_linux_amd64.tgz")
 
     def is_installed(self):
         return os.path.exists(self.GDU_BINARY_PATH)
 
+    def installed_version(self):
+        try:
+            result = subprocess.run([self.GDU_BINARY_PATH, "--version"], capture_output=True, text=True, check=True)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        match = re.search(r"v?(\d+\.\d+\.\d+)", result.stdout)
+        return match.group(1) if match else None
+
     def install(self):
         if self.is_installed():
             self.logger.info("GDU já está instalado.")
@@ -17,16 +30,45 @@ class GduInstaller(BaseInstaller):
         
         self.logger.info("Instalando GDU (ferramenta para uso de disco)...")
         try:
-            subprocess.run(f"curl -L {self.DOWNLOAD_URL} | tar xz", shell=True, check=True)
-            subprocess.run(["chmod", "+x", "gdu_linux_amd64"], check=True)
-            subprocess.run(["sudo", "mv", "gdu_linux_amd64", self.GDU_BINARY_PATH], check=True)
+            self.deploy(get_resolver().resolve(self.RELEASE))
             self.logger.info("GDU instalado com sucesso.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro ao instalar GDU: %s", e)
             raise
 
+    def deploy(self, release):
+        staging_dir = get_cache().extract(
+            release["url"], version=release["version"], checksum=release["checksum"], size=release["size"]
+        )
+        try:
+            binary_path = os.path.join(staging_dir, "gdu_linux_amd64")
+            os.chmod(binary_path, 0o755)
+            subprocess.run(["sudo", "mv", binary_path, self.GDU_BINARY_PATH], check=True)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def plan(self):
+        if self.is_installed():
+            return []
+        step, version = release_download(self.RELEASE)
+        return [step, Extract(step.path, self.GDU_BINARY_PATH, member="gdu_linux_amd64")]
+
+    def installed_info(self):
+        return {"version": self.installed_version(), "files": [self.GDU_BINARY_PATH]}
+
     def update(self):
-        self.logger.info("Atualização não suportada para GDU.")
+        self.logger.info("Atualizando GDU...")
+        try:
+            release = get_resolver().resolve(self.RELEASE)
+            if self.installed_version() == release["version"]:
+                self.logger.info("GDU %s já é a versão mais recente.", release["version"])
+                return
+
+            self.deploy(release)
+            self.logger.info("GDU atualizado para %s.", release["version"])
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
+            self.logger.error("Erro ao atualizar GDU: %s", e)
+            raise
 
     def uninstall(self):
         """Desinstala o GDU, se estiver instalado."""
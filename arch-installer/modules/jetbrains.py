@@ -1,13 +1,16 @@
 import subprocess
 import os
-import requests
-import json
-import re
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import USR_LOCAL_BIN
+from scheduler import lock
+from download_cache import DownloadError, get_cache
+from releases import JetBrainsRelease, get_resolver
+from planner import release_download, versioned_deploy
+from versions import VersionedInstall
 
 class JetbrainsInstaller(BaseInstaller):
+
     INSTALL_DIR = "~/Programs"
 
     """
@@ -16,99 +19,107 @@ class JetbrainsInstaller(BaseInstaller):
     """
     SYMLINK_PATH = "/usr/local/bin/jetbrains-toolbox"
 
-    TEMP_TAR = "/tmp/jetbrains-toolbox.tar.gz"
+    RELEASE = JetBrainsRelease("TBA")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = VersionedInstall(os.path.join(self.INSTALL_DIR, "jetbrains-toolbox"))
 
     def install(self):
         self.logger.info("Instalando JetBrains Toolbox...")
         try:
-            self.get_latest_toolbox_linux_info()
-
-            subprocess.run(["wget", self.download_url, "-O", self.TEMP_TAR], check=True)
-            
-            full_install_dir = os.path.expanduser(self.INSTALL_DIR)
-            if not os.path.exists(full_install_dir):
-                os.makedirs(full_install_dir, exist_ok=True)
-                self.logger.info("Diretório %s criado.", self.INSTALL_DIR)
-            
-            subprocess.run(["tar", "xzf", self.TEMP_TAR, "-C", full_install_dir], check=True)
-            
-            # Cria o link simbólico para o executável
-            # Após a extração o executável estará em INSTALL_DIR/jetbrains-toolbox.
-            executable_path = os.path.join(full_install_dir, f"jetbrains-toolbox-{self.build_version}", "jetbrains-toolbox")
-            if os.path.exists(executable_path):
-                subprocess.run(["sudo", "ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
-                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
-            else:
-                self.logger.warning("Executável JetBrains Toolbox não encontrado em %s", executable_path)
-                return
-            
+            self.deploy()
             self.logger.info("JetBrains Toolbox instalado com sucesso.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro ao instalar JetBrains Toolbox: %s", e)
             self.uninstall()
             raise
-        finally:
-            if os.path.exists(self.TEMP_TAR):
-                subprocess.run(["rm", self.TEMP_TAR], check=True)
-                self.logger.info("Arquivo temporário de instação removido.")
 
+    def deploy(self):
+        """
+        Instala a versão mais recente ao lado da atual e a ativa.
+        Retorna False se a versão mais recente já estiver ativa.
+        """
+        release = get_resolver().resolve(self.RELEASE)
+        self.build_version = release["version"]
+        if self.versions.current() == self.build_version:
+            self.logger.info("JetBrains Toolbox %s já está instalado.", self.build_version)
+            return False
+
+        staging_dir = get_cache().extract(
+            release["url"],
+            strip_components=1,
+            version=self.build_version,
+            checksum_url=release["checksum_url"],
+            size=release["size"]
+        )
+        self.versions.add(staging_dir, self.build_version)
+        if not os.path.exists(self.versions.path(self.build_version, "jetbrains-toolbox")):
+            raise DownloadError(f"Executável JetBrains Toolbox não encontrado na versão {self.build_version}")
+
+        self.versions.activate(self.build_version)
+
+        # O symlink aponta para a versão ativa ('current'), então só precisa ser criado uma vez.
+        executable_path = self.versions.executable("jetbrains-toolbox")
+        if os.path.realpath(self.SYMLINK_PATH) != os.path.realpath(executable_path):
+            with lock(USR_LOCAL_BIN):
+                subprocess.run(["sudo", "ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
+                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
+
+        self.versions.gc()
+        return True
+
+    def plan(self):
+        step, version = release_download(self.RELEASE)
+        if self.versions.current() == version:
+            return []
+        return [step] + versioned_deploy(
+            self.versions, version, step.path, {self.SYMLINK_PATH: self.versions.executable("jetbrains-toolbox")}
+        )
 
     def update(self):
         self.logger.info("Atualizando JetBrains Toolbox...")
         try:
-            self.uninstall()
-            self.install()
-            self.logger.info("JetBrains Toolbox atualizado com sucesso.")
+            if self.deploy():
+                self.logger.info("JetBrains Toolbox atualizado para %s.", self.build_version)
         except Exception as e:
+            # A versão anterior continua ativa.
             self.logger.error("Erro ao atualizar JetBrains Toolbox: %s", e)
             raise
 
+    def installed_info(self):
+        return {
+            "version": self.versions.current(),
+            "files": [self.versions.root],
+            "symlinks": [self.SYMLINK_PATH],
+            "packages": self.PACKAGES,
+        }
+
+    def rollback(self):
+        try:
+            version = self.versions.rollback()
+            self.logger.info("JetBrains Toolbox revertido para %s.", version)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            self.logger.error("Erro ao reverter JetBrains Toolbox: %s", e)
+            raise
 
     def uninstall(self):
         self.logger.info("Desinstalando JetBrains Toolbox...")
         try:
             if os.path.islink(self.SYMLINK_PATH) or os.path.exists(self.SYMLINK_PATH):
-                subprocess.run(["sudo", "rm", "-f", self.SYMLINK_PATH], check=True)
+                with lock(USR_LOCAL_BIN):
+                    subprocess.run(["sudo", "rm", "-f", self.SYMLINK_PATH], check=True)
                 self.logger.info("Symlink %s removido.", self.SYMLINK_PATH)
             else:
                 self.logger.info("Symlink %s não encontrado.", self.SYMLINK_PATH)
             
+            self.versions.remove()
+
+            # Diretórios do layout antigo, sem versões lado a lado.
             jetbrains_dirs = os.path.join(self.INSTALL_DIR, "jetbrains-toolbox-*")
             full_install_dir = os.path.expanduser(jetbrains_dirs)
             subprocess.run(f"rm -rf {full_install_dir}", check=True, shell=True)
-            self.logger.info("Diretório de instalação %s removido.", jetbrains_dirs)
+            self.logger.info("Diretório de instalação %s removido.", self.versions.root)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar JetBrains Toolbox: %s", e)
             raise
-
-    def get_latest_toolbox_linux_info(self):
-        """
-        Busca as informações de lançamento mais recentes do aplicativo JetBrains Toolbox para Linux,
-        extrai o link e o tamanho do download e os imprime.
-
-        Referência: https://github.com/nagygergo/jetbrains-toolbox-install/blob/master/jetbrains-toolbox.sh
-        """
-
-        url = 'https://data.services.jetbrains.com/products/releases?code=TBA&latest=true&type=release'
-
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Lança HTTPError para status 4xx ou 5xx
-            data = response.json()
-
-            if 'TBA' in data and len(data['TBA']) > 0:
-                linux_data = data['TBA'][0]['downloads']['linux']
-                download_link = linux_data['link']
-                file_size = linux_data['size']
-                
-                self.download_url = download_link
-                self.build_version = data['TBA'][0]['build']
-            else:
-                self.logger.warning("Nenhuma informação de release foi encontrada para o Linux.")
-
-        except requests.exceptions.RequestException as e:
-            self.logger.error("Ocorreu um erro durante o envio da requisição para 'Jetbrains Data Service': %s", e)
-        except json.JSONDecodeError as e:
-            self.logger.error("Erro ao decodificar a resposta JSON: %s", e)
-        except KeyError as e:
-            self.logger.error("A chave esperada não foi encontrada dentro do JSON: %s", e)
@@ -3,9 +3,26 @@ import os
 import shutil
 
 from base_installer import BaseInstaller
+from config import VERSIONS_DIR
+from download_cache import DownloadError, get_cache
+from releases import GitHubRelease, get_resolver
+from planner import Command, Copy, Symlink, release_download
+from versions import VersionedInstall
 
 class MiseInstaller(BaseInstaller):
 
+    """
+    Binário publicado nos releases do projeto; é o mesmo que o script https://mise.run instala.
+    Referência: https://mise.jdx.dev/installing-mise.html
+    """
+    RELEASE = GitHubRelease("jdx/mise", "mise-{tag}-linux-x64")
+
+    MISE_PATH = "~/.local/bin/mise"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = VersionedInstall(os.path.join(VERSIONS_DIR, "mise"))
+
     def is_installed(self):
         return shutil.which("mise")
 
@@ -17,9 +34,9 @@ class MiseInstaller(BaseInstaller):
             return
 
         try:
-            subprocess.run("curl https://mise.run | sh", shell=True, check=True)
+            self.deploy()
             
-            mise_path = os.path.expanduser("~/.local/bin/mise")
+            mise_path = os.path.expanduser(self.MISE_PATH)
             if os.path.exists(mise_path):
                 self.activate()
                 self.logger.info("Mise CLI instalado com sucesso em %s.", mise_path)
@@ -28,11 +45,61 @@ class MiseInstaller(BaseInstaller):
                 return
 
             self.logger.info("Mise instalado com sucesso.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro ao instalar Mise CLI: %s", e)
             self.uninstall()
             raise
 
+    def deploy(self):
+        """
+        Instala a versão mais recente do binário ao lado da atual e a ativa.
+        Retorna False se a versão mais recente já estiver ativa.
+        """
+        release = get_resolver().resolve(self.RELEASE)
+        version = release["version"]
+        if self.versions.current() == version:
+            self.logger.info("Mise CLI %s já é a versão mais recente.", version)
+            return False
+
+        cache = get_cache()
+        binary_path = cache.fetch(release["url"], version=version, checksum=release["checksum"], size=release["size"])
+
+        staging_dir = cache.new_staging()
+        shutil.copyfile(binary_path, os.path.join(staging_dir, "mise"))
+        os.chmod(os.path.join(staging_dir, "mise"), 0o755)
+        self.versions.add(staging_dir, version)
+        self.versions.activate(version)
+
+        # ~/.local/bin/mise aponta para a versão ativa. Uma instalação antiga (arquivo
+        # regular criado pelo script https://mise.run) é substituída pelo symlink.
+        mise_path = os.path.expanduser(self.MISE_PATH)
+        executable_path = self.versions.executable("mise")
+        if os.path.realpath(mise_path) != os.path.realpath(executable_path):
+            os.makedirs(os.path.dirname(mise_path), exist_ok=True)
+            subprocess.run(["ln", "-sf", executable_path, mise_path], check=True)
+            self.logger.debug("Symlink criado: %s -> %s", mise_path, executable_path)
+
+        self.versions.gc()
+        return True
+
+    def plan(self):
+        if self.is_installed():
+            return []
+        step, version = release_download(self.RELEASE)
+        return [
+            step,
+            Copy(step.path, self.versions.path(version, "mise")),
+            Symlink(self.versions.current_link, self.versions.path(version)),
+            Symlink(os.path.expanduser(self.MISE_PATH), self.versions.executable("mise")),
+            Command(("mise", "activate")),
+        ]
+
+    def bundle(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        # O binário também instala no bundle as ferramentas das linguagens (ver bundle.py).
+        get_bundle().add_mise(self.RELEASE)
+
     def activate(self, shell_type=None):
         """
         Configura a ativação do Mise no shell.
@@ -69,7 +136,7 @@ class MiseInstaller(BaseInstaller):
                 rc_file = os.path.expanduser("~/.bashrc")
         
         # Define a linha de ativação; utiliza o caminho completo para o binário do mise.
-        mise_path = os.path.expanduser("~/.local/bin/mise")
+        mise_path = os.path.expanduser(self.MISE_PATH)
         activation_line = f'eval "$({mise_path} activate {shell_type})"'
         
         try:
@@ -97,13 +164,29 @@ class MiseInstaller(BaseInstaller):
     def update(self):
         self.logger.info("Atualizando Mise...")
         try:
-            self.uninstall()
-            self.install()
-            self.logger.info("Mise atualizado com sucesso.")
+            if self.deploy():
+                self.logger.info("Mise atualizado com sucesso.")
         except Exception as e:
+            # A versão anterior continua ativa.
             self.logger.error("Erro ao atualizar Mise: %s", e)
             raise
 
+    def installed_info(self):
+        return {
+            "version": self.versions.current(),
+            "files": [self.versions.root],
+            "symlinks": [self.MISE_PATH],
+            "packages": self.PACKAGES,
+        }
+
+    def rollback(self):
+        try:
+            version = self.versions.rollback()
+            self.logger.info("Mise revertido para a versão %s.", version)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            self.logger.error("Erro ao reverter Mise: %s", e)
+            raise
+
     def uninstall(self):
         self.logger.info("Desinstalando Mise...")
 
@@ -112,7 +195,7 @@ class MiseInstaller(BaseInstaller):
             return
 
         try:
-            mise_path = os.path.expanduser("~/.local/bin/mise")
+            mise_path = os.path.expanduser(self.MISE_PATH)
             if os.path.exists(mise_path):
                 subprocess.run([mise_path, "implode", "--yes"], check=True)
                 self.logger.info("Mise desinstalado via 'mise implode' com sucesso.")
@@ -127,6 +210,10 @@ class MiseInstaller(BaseInstaller):
                 "~/.cache/mise"
             ]
 
+            self.versions.remove()
+            if os.path.islink(mise_path):
+                os.remove(mise_path)
+
             for dir_path in directories:
                 full_path = os.path.expanduser(dir_path)
                 if os.path.exists(full_path):
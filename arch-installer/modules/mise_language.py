@@ -1,8 +1,10 @@
 import subprocess
-import os
 
 from base_installer import BaseInstaller
+from download_cache import DownloadError
+from planner import Command
 from modules.mise import MiseInstaller
+from mise_query import is_tool_installed, use_tools, uninstall_tool
 
 class LanguageInstaller(BaseInstaller):
 
@@ -13,8 +15,8 @@ class LanguageInstaller(BaseInstaller):
     def is_installed(self, language, version = None):
         """
         Verifica se a linguagem e a versão especificada já estão instaladas.
-        Utiliza o comando 'mise list --global' para obter as linguagens instaladas e
-        checa se a string '<linguagem>@<versão>' está presente na saída.
+        A consulta é respondida pelo índice de 'mise ls --json' (ver mise_query), obtido
+        uma única vez por execução e invalidado após cada instalação ou remoção.
         
         Retorna:
             bool: True se estiver instalada, False caso contrário.
@@ -23,25 +25,8 @@ class LanguageInstaller(BaseInstaller):
             return False
 
         try:
-            result = subprocess.run(
-                ["mise", "list", "--global"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            if version:
-                lines = result.stdout.splitlines()
-                for line in lines:
-                    if f"{language}" in line and version and f"{version}" in line:
-                        installed  = True
-                        break
-                installed  = False
-            else:
-                installed = f"{language}" in result.stdout
-        
-            return installed
-        except subprocess.CalledProcessError as e:
+            return is_tool_installed(language, version)
+        except (subprocess.CalledProcessError, ValueError) as e:
             self.logger.error("Erro ao verificar instalação de %s: %s", language, e)
             return False
 
@@ -56,40 +41,54 @@ class LanguageInstaller(BaseInstaller):
 
         Exemplo de comando: mise use --global node@22.14.0
         """
+        self.install_many({language: version})
+
+    def install_many(self, languages):
+        """
+        Instala várias linguagens {linguagem: versão} com uma única chamada ao 'mise',
+        que baixa e compila as ferramentas em paralelo.
 
+        Exemplo de comando: mise use --global node@22.14.0 python@3.13.2 java@21
+        """
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
         if not self.mise_installer.is_installed():
             self.mise_installer.install()
 
-        self.logger.info("Instalando %s versão %s...", language, version)
+        tools = " ".join(f"{language}@{version}" for language, version in languages.items())
+        self.logger.info("Instalando %s...", tools)
         try:
-            subprocess.run(
-                ["mise", "use", "--global", f"{language}@{version}"],
-                check=True
-            )
-            self.logger.info("%s versão %s instalada com sucesso.", language, version)
-        except subprocess.CalledProcessError as e:
-            self.logger.error("Erro ao instalar %s: %s", language, e)
+            # Com um bundle, as ferramentas já compiladas são copiadas dele e apenas ativadas.
+            if get_bundle() is not None:
+                get_bundle().restore_mise_tools(languages)
+            use_tools(languages, offline=get_bundle() is not None)
+            self.logger.info("%s instalado(s) com sucesso.", tools)
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
+            self.logger.error("Erro ao instalar %s: %s", tools, e)
             raise
 
+    def plan_many(self, languages):
+        if not languages:
+            return []
+        tools = tuple(f"{language}@{version}" for language, version in languages.items())
+        return [Command(("mise", "use", "--global") + tools)]
+
     def update(self):
         """
         Método para atualização da linguagem. 
         Neste exemplo, a atualização não foi implementada, mas pode ser adaptada conforme necessário.
         """
-        self.logger.info("Atualização não suportada para %s.", self.language)
+        self.logger.info("Atualização não suportada para linguagens do mise.")
 
     def uninstall(self, language, version):
         """
         Desinstala a linguagem utilizando o 'mise uninstall'.
-        Exemplo de comando: mise uninstall -- --global node@22.14.0
+        Exemplo de comando: mise uninstall node@22.14.0
         """
         self.logger.info("Desinstalando %s versão %s...", language, version)
 
         try:
-            subprocess.run(
-                ["mise", "uninstall", "--", "--global", f"{language}@{version}"],
-                check=True
-            )
+            uninstall_tool(language, version)
             self.logger.info("%s versão %s desinstalada com sucesso.", language, version)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar %s: %s", language, e)
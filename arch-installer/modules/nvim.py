@@ -1,14 +1,17 @@
 import subprocess
 import os
-import requests
-import json
-import re
 import shutil
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import USR_LOCAL_BIN
+from scheduler import lock
+from download_cache import DownloadError, get_cache
+from releases import GitHubRelease, get_resolver
+from planner import release_download, versioned_deploy
+from versions import VersionedInstall
 
 class NvimInstaller(BaseInstaller):
+
     INSTALL_DIR = "/opt/nvim-linux-x86_64"
 
     """
@@ -20,13 +23,15 @@ class NvimInstaller(BaseInstaller):
     """
     Tutorial de instalação: https://github.com/neovim/neovim/blob/master/INSTALL.md#install-from-package
     """
-    DOWNLOAD_URL = "https://github.com/neovim/neovim/releases/latest/download/nvim-linux-x86_64.tar.gz"
-
-    TEMP_TAR = "/tmp/nvim-linux-x86_64.tar.gz"
+    RELEASE = GitHubRelease("neovim/neovim", "nvim-linux-x86_64.tar.gz")
 
     def is_installed(self):
         return shutil.which("nvim")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = VersionedInstall(self.INSTALL_DIR, sudo=True)
+
     def install(self):
         self.logger.info("Instalando Nvim...")
 
@@ -35,47 +40,86 @@ class NvimInstaller(BaseInstaller):
                 self.logger.info("Nvim já está instalado.")
                 return
 
-            subprocess.run(["curl", "-L", "-o", self.TEMP_TAR, self.DOWNLOAD_URL], check=True)
-            
-            if not os.path.exists(self.TEMP_TAR):
-                self.logger.error("Download falhou. Arquivo %s não encontrado.", self.TEMP_TAR)
-                return
-
-            if not os.path.exists(self.INSTALL_DIR):
-                subprocess.run(["sudo", "mkdir", "-p", self.INSTALL_DIR], check=True)
-                subprocess.run(["sudo", "chown", os.getlogin(), self.INSTALL_DIR], check=True)
-                self.logger.debug("Diretório %s criado.", self.INSTALL_DIR)
-            
-            # --strip-components=1 remove o primeiro nível do caminho dos arquivos extraídos.
-            # Exemplo: ao invés de "/opt/nvim-linux-x86_64/nvim-linux-x86_64/bin" -> "/opt/nvim-linux-x86_64/bin"
-            subprocess.run(["tar", "xzf", self.TEMP_TAR, "-C", self.INSTALL_DIR, "--strip-components=1"], check=True)
-            
-            # Cria o link simbólico para o executável
-            # Após a extração o executável estará em INSTALL_DIR/bin/nvim.
-            executable_path = os.path.join(self.INSTALL_DIR, "bin", "nvim")
-            if os.path.exists(executable_path):
-                subprocess.run(["sudo", "ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
-                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
-            else:
-                self.logger.warning("Executável Nvim não encontrado em %s", executable_path)
-                return
-            
+            self.deploy()
             self.logger.info("Nvim instalado com sucesso.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError) as e:
             self.logger.error("Erro ao instalar Nvim: %s", e)
             self.uninstall()
             raise
 
+    def deploy(self):
+        """
+        Instala a versão mais recente ao lado da atual e a ativa.
+        Retorna False se a versão mais recente já estiver ativa.
+        """
+        release = get_resolver().resolve(self.RELEASE)
+        version = release["version"]
+        if self.versions.current() == version:
+            self.logger.info("Nvim %s já é a versão mais recente.", version)
+            return False
+
+        # strip_components=1 remove o primeiro nível do caminho dos arquivos extraídos.
+        # Exemplo: ao invés de "versions/<versão>/nvim-linux-x86_64/bin" -> "versions/<versão>/bin"
+        # O diretório de staging pertence ao usuário, então dispensa o 'chown'.
+        staging_dir = get_cache().extract(
+            release["url"],
+            strip_components=1,
+            version=version,
+            checksum=release["checksum"],
+            size=release["size"]
+        )
+        self.versions.add(staging_dir, version)
+        if not os.path.exists(self.versions.path(version, "bin", "nvim")):
+            raise DownloadError(f"Executável Nvim não encontrado em {self.versions.path(version)}")
+        self.versions.activate(version)
+
+        # Cria o link simbólico para o executável
+        # O executável da versão ativa fica em INSTALL_DIR/current/bin/nvim.
+        executable_path = self.versions.executable("bin", "nvim")
+        if os.path.realpath(self.SYMLINK_PATH) != os.path.realpath(executable_path):
+            with lock(USR_LOCAL_BIN):
+                subprocess.run(["sudo", "ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
+                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
+
+        self.versions.gc()
+        return True
+
+    def plan(self):
+        if self.is_installed():
+            return []
+        step, version = release_download(self.RELEASE)
+        if self.versions.current() == version:
+            return []
+        return [step] + versioned_deploy(
+            self.versions, version, step.path, {self.SYMLINK_PATH: self.versions.executable("bin", "nvim")}
+        )
+
     def update(self):
         self.logger.info("Atualizando Nvim...")
         try:
-            self.uninstall()
-            self.install()
-            self.logger.info("Nvim atualizado com sucesso.")
+            if self.deploy():
+                self.logger.info("Nvim atualizado com sucesso.")
         except Exception as e:
+            # A versão anterior continua ativa.
             self.logger.error("Erro ao atualizar Nvim: %s", e)
             raise
 
+    def installed_info(self):
+        return {
+            "version": self.versions.current(),
+            "files": [self.versions.root],
+            "symlinks": [self.SYMLINK_PATH],
+            "packages": self.PACKAGES,
+        }
+
+    def rollback(self):
+        try:
+            version = self.versions.rollback()
+            self.logger.info("Nvim revertido para a versão %s.", version)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            self.logger.error("Erro ao reverter Nvim: %s", e)
+            raise
+
     def uninstall(self):
         self.logger.info("Desinstalando Nvim...")
 
@@ -85,13 +129,14 @@ class NvimInstaller(BaseInstaller):
 
         try:
             if os.path.islink(self.SYMLINK_PATH) or os.path.exists(self.SYMLINK_PATH):
-                subprocess.run(["sudo", "rm", "-f", self.SYMLINK_PATH], check=True)
+                with lock(USR_LOCAL_BIN):
+                    subprocess.run(["sudo", "rm", "-f", self.SYMLINK_PATH], check=True)
                 self.logger.debug("Symlink %s removido.", self.SYMLINK_PATH)
             else:
                 self.logger.debug("Symlink %s não encontrado.", self.SYMLINK_PATH)
             
             if os.path.exists(self.INSTALL_DIR):
-                subprocess.run(["sudo", "rm", "-rf", self.INSTALL_DIR], check=True)
+                self.versions.remove()
                 self.logger.debug("Diretório de instalação %s removido.", self.INSTALL_DIR)
             else:
                 self.logger.info("Nvim não está instalado. Nenhuma ação necessária.")
@@ -1,24 +1,39 @@
 import subprocess
 import os
-import requests
-import json
-import re
 import shutil
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import NVIM_CONFIG
+from scheduler import lock
+from planner import Clone, Command, Move, PackageTransaction
+from packages import install_packages
 
 from modules.nvim import NvimInstaller
 from modules.mise_language import LanguageInstaller
 from modules.gdu import GduInstaller
 
 class AstroVimInstaller(BaseInstaller):
+    DEPENDS_ON = ["nvim", "mise", "gdu"]
+
     INSTALL_DIR = "~/.config/nvim"
 
-    DEPENDENCIES = ["ripgrep", "lazygit", "bottom"]
+    PACKAGES = ["ripgrep", "lazygit", "bottom"]
 
     DOWNLOAD_URL = "https://github.com/AstroNvim/template.git"
 
+    # Diretórios do Neovim renomeados para '<diretório>.bak' antes da instalação.
+    BACKUP_DIRS = [
+        "~/.config/nvim",
+        "~/.local/share/nvim",
+        "~/.local/state/nvim",
+        "~/.cache/nvim"
+    ]
+
+    LANGUAGES = {
+        "node": "22.14.0", # Lastest LTS
+        "python": "3.13.2", # Lastest stable version
+    }
+
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -27,52 +42,47 @@ class AstroVimInstaller(BaseInstaller):
         self.gdu_installer = GduInstaller()
 
     def install(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import repository_url
         self.logger.info("Iniciando a instalação do AstroVim...")
         try:
             self.logger.info("Instalando dependências ...")
 
             self.nvim_installer.install()
 
-            if not self.mise_language_installer.is_installed("node"):
-                self.mise_language_installer.install("node", "22.14.0") # Lastest LTS
+            missing = {
+                language: version for language, version in self.LANGUAGES.items()
+                if not self.mise_language_installer.is_installed(language)
+            }
+            if missing:
+                self.mise_language_installer.install_many(missing)
 
-            if not self.mise_language_installer.is_installed("python"):
-                self.mise_language_installer.install("python", "3.13.2") # Lastest stable version
-
-            subprocess.run(
-                [PACKAGE_MANAGER, "-Sy", "--needed"] + self.DEPENDENCIES + ["--noconfirm"],
-                check=True
-            )
+            install_packages(self.PACKAGES)
 
             self.gdu_installer.install()
 
-            # Realiza backup dos diretórios existentes do Neovim
-            self.logger.info("Realizando backup dos diretórios existentes...")
-            backup_dirs = [
-                "~/.config/nvim",
-                "~/.local/share/nvim",
-                "~/.local/state/nvim",
-                "~/.cache/nvim"
-            ]
-            for directory in backup_dirs:
-                full_path = os.path.expanduser(directory)
-                if os.path.exists(full_path):
-                    backup_path = full_path + ".bak"
-                    os.rename(full_path, backup_path)
-                    self.logger.info("Backup de '%s' realizado para '%s'.", full_path, backup_path)
-
-            full_install_dir = os.path.expanduser(self.INSTALL_DIR)
-            self.logger.info("Clonando o repositório do AstroVim em %s...", full_install_dir)
-            subprocess.run(
-                ["git", "clone", "--depth", "1", self.DOWNLOAD_URL, full_install_dir],
-                check=True
-            )
-
-            # Remoção do diretório .git para desvincular o template do repositório original
-            git_dir = os.path.join(full_install_dir, ".git")
-            if os.path.exists(git_dir):
-                subprocess.run(["rm", "-rf", git_dir], check=True)
-                self.logger.info("Diretório .git removido do template.")
+            with lock(NVIM_CONFIG):
+                # Realiza backup dos diretórios existentes do Neovim
+                self.logger.info("Realizando backup dos diretórios existentes...")
+                for directory in self.BACKUP_DIRS:
+                    full_path = os.path.expanduser(directory)
+                    if os.path.exists(full_path):
+                        backup_path = full_path + ".bak"
+                        os.rename(full_path, backup_path)
+                        self.logger.info("Backup de '%s' realizado para '%s'.", full_path, backup_path)
+
+                full_install_dir = os.path.expanduser(self.INSTALL_DIR)
+                self.logger.info("Clonando o repositório do AstroVim em %s...", full_install_dir)
+                subprocess.run(
+                    ["git", "clone", "--depth", "1", repository_url(self.DOWNLOAD_URL), full_install_dir],
+                    check=True
+                )
+
+                # Remoção do diretório .git para desvincular o template do repositório original
+                git_dir = os.path.join(full_install_dir, ".git")
+                if os.path.exists(git_dir):
+                    subprocess.run(["rm", "-rf", git_dir], check=True)
+                    self.logger.info("Diretório .git removido do template.")
 
             if not os.path.exists(full_install_dir):
                 self.logger.error("Download falhou. Diretório %s não encontrado.", full_install_dir)
@@ -84,6 +94,33 @@ class AstroVimInstaller(BaseInstaller):
             self.uninstall()
             raise
 
+    def plan(self):
+        missing = {
+            language: version for language, version in self.LANGUAGES.items()
+            if not self.mise_language_installer.is_installed(language)
+        }
+        steps = self.nvim_installer.plan() + self.mise_language_installer.plan_many(missing)
+        steps += [PackageTransaction(tuple(self.PACKAGES))] + self.gdu_installer.plan()
+        for directory in self.BACKUP_DIRS:
+            full_path = os.path.expanduser(directory)
+            if os.path.exists(full_path):
+                steps.append(Move(full_path, full_path + ".bak"))
+        full_install_dir = os.path.expanduser(self.INSTALL_DIR)
+        return steps + [
+            Clone(self.DOWNLOAD_URL, full_install_dir),
+            Command(("rm", "-rf", os.path.join(full_install_dir, ".git"))),
+        ]
+
+    def bundle(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        super().bundle()
+        get_bundle().add_repository(self.DOWNLOAD_URL)
+        get_bundle().add_mise_tools(self.LANGUAGES)
+
+    def installed_info(self):
+        return {"files": [self.INSTALL_DIR], "packages": self.PACKAGES}
+
     def update(self):
         self.logger.info("Para atualizar o AstroVim, abra o Neovim e execute o comando ':AstroUpdate'.")
 
@@ -92,11 +129,9 @@ class AstroVimInstaller(BaseInstaller):
         try:
             self.nvim_installer.uninstall()
 
-            if self.mise_language_installer.is_installed("node", "22.14.0"):
-                self.mise_language_installer.uninstall("node", "22.14.0") # Lastest LTS
-
-            if self.mise_language_installer.is_installed("python", "3.13.2"):
-                self.mise_language_installer.uninstall("python", "3.13.2") # Lastest stable version
+            for language, version in self.LANGUAGES.items():
+                if self.mise_language_installer.is_installed(language, version):
+                    self.mise_language_installer.uninstall(language, version)
 
             self.gdu_installer.uninstall()
 
@@ -106,11 +141,12 @@ class AstroVimInstaller(BaseInstaller):
                 "~/.local/share/nvim",
                 "~/.cache/nvim"
             ]
-            for path in dirs:
-                full_path = os.path.expanduser(path)
-                if os.path.exists(full_path):
-                    subprocess.run(["sudo", "rm", "-rf", full_path], check=True)
-                    self.logger.debug("Diretório '%s' removido.", full_path)
+            with lock(NVIM_CONFIG):
+                for path in dirs:
+                    full_path = os.path.expanduser(path)
+                    if os.path.exists(full_path):
+                        subprocess.run(["sudo", "rm", "-rf", full_path], check=True)
+                        self.logger.debug("Diretório '%s' removido.", full_path)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar AstroVim: %s", e)
             raise
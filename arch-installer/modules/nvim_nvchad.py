@@ -1,17 +1,19 @@
 import subprocess
 import os
-import requests
-import json
-import re
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import NVIM_CONFIG
+from scheduler import lock
+from planner import Clone, PackageTransaction
+from packages import install_packages
 from modules.nvim import NvimInstaller
 
 class NvChadInstaller(BaseInstaller):
+    DEPENDS_ON = ["nvim"]
+
     INSTALL_DIR = "~/.config/nvim"
 
-    DEPENDENCIES = ["ripgrep"]
+    PACKAGES = ["ripgrep"]
 
     DOWNLOAD_URL = "git@github.com:NvChad/starter.git"
 
@@ -21,16 +23,19 @@ class NvChadInstaller(BaseInstaller):
         self.nvim_installer = NvimInstaller()
 
     def install(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import repository_url
         self.logger.info("Instalando NvChad...")
 
         self.nvim_installer.install()
 
         try:
             self.logger.info("Instalando dependências...")
-            subprocess.run([PACKAGE_MANAGER, "-Sy", "--needed"] + self.DEPENDENCIES + ["--noconfirm"], check=True)
+            install_packages(self.PACKAGES)
 
-            full_install_dir = os.path.expanduser(self.INSTALL_DIR)
-            subprocess.run(["git", "clone", self.DOWNLOAD_URL, full_install_dir], check=True)
+            with lock(NVIM_CONFIG):
+                full_install_dir = os.path.expanduser(self.INSTALL_DIR)
+                subprocess.run(["git", "clone", repository_url(self.DOWNLOAD_URL), full_install_dir], check=True)
             
             if not os.path.exists(full_install_dir):
                 self.logger.error("Download falhou. Diretório %s não encontrado.", full_install_dir)
@@ -42,6 +47,21 @@ class NvChadInstaller(BaseInstaller):
             self.uninstall()
             raise
 
+    def plan(self):
+        return self.nvim_installer.plan() + [
+            PackageTransaction(tuple(self.PACKAGES)),
+            Clone(self.DOWNLOAD_URL, os.path.expanduser(self.INSTALL_DIR)),
+        ]
+
+    def bundle(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        super().bundle()
+        get_bundle().add_repository(self.DOWNLOAD_URL)
+
+    def installed_info(self):
+        return {"files": [self.INSTALL_DIR], "packages": self.PACKAGES}
+
     def update(self):
         self.logger.info("Para atualizar o NvChad, basta digital 'Lazy sync' dentro do Nvim.")
 
@@ -53,12 +73,13 @@ class NvChadInstaller(BaseInstaller):
         try:
             dirs = [self.INSTALL_DIR, "~/.local/state/nvim", "~/.local/share/nvim"]
 
-            for path in dirs:
-                full_path = os.path.expanduser(path)
+            with lock(NVIM_CONFIG):
+                for path in dirs:
+                    full_path = os.path.expanduser(path)
 
-                if os.path.exists(full_path):
-                    subprocess.run(["sudo", "rm", "-rf", full_path], check=True)
-                    self.logger.debug("Diretório de instalação %s removido.", full_path)
+                    if os.path.exists(full_path):
+                        subprocess.run(["sudo", "rm", "-rf", full_path], check=True)
+                        self.logger.debug("Diretório de instalação %s removido.", full_path)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar NvChad: %s", e)
             raise
@@ -2,9 +2,14 @@ import subprocess
 import os
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import USR_LOCAL_BIN
+from scheduler import lock
+from download_cache import DownloadError, get_cache
+from versions import VersionedInstall
+from planner import download, versioned_deploy
 
 class PostmanInstaller(BaseInstaller):
+
     INSTALL_DIR = "/opt/Postman"
 
     """
@@ -15,49 +20,93 @@ class PostmanInstaller(BaseInstaller):
 
     DOWNLOAD_URL = "https://dl.pstmn.io/download/latest/linux64"
 
-    TEMP_TAR = "/tmp/postman.tar.gz"
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.versions = VersionedInstall(self.INSTALL_DIR)
 
     def install(self):
         self.logger.info("Instalando Postman...")
         try:
-            subprocess.run(["wget", self.DOWNLOAD_URL, "-O", self.TEMP_TAR], check=True)
-            
-            if not os.path.exists(self.INSTALL_DIR):
-                os.makedirs(self.INSTALL_DIR, exist_ok=True)
-                self.logger.debug("Diretório %s criado.", self.INSTALL_DIR)
-            
-            subprocess.run(["tar", "xzf", self.TEMP_TAR, "-C", self.INSTALL_DIR], check=True)
-            
-            # Cria um symlink para o executável do Postman
-            # O executável fica em INSTALL_DIR/Postman/Postman
-            executable_path = os.path.join(self.INSTALL_DIR, "Postman", "Postman")
-            if os.path.exists(executable_path):
-                subprocess.run(["ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
-                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
-            else:
-                self.logger.warning("Executável Postman não encontrado em %s", executable_path)
-            
+            self.deploy()
             self.logger.info("Postman instalado com sucesso.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro ao instalar Postman: %s", e)
             self.uninstall()
             raise
 
+    def deploy(self):
+        """
+        Instala a versão mais recente ao lado da atual e a ativa.
+        Retorna False se a versão mais recente já estiver ativa.
+        """
+        # A URL "latest" não informa a versão: ela é identificada pelo sha256 do arquivo
+        # (nome do blob no cache), revalidado com uma requisição condicional.
+        cache = get_cache()
+        archive_path = cache.fetch(self.DOWNLOAD_URL)
+        version = os.path.basename(archive_path)[:12]
+        if self.versions.current() == version:
+            self.logger.info("Postman já está na versão mais recente.")
+            return False
+
+        self.versions.add(cache.extract_blob(archive_path), version)
+        self.versions.activate(version)
+        self.logger.debug("Postman extraído em %s.", self.versions.path(version))
+
+        # Cria um symlink para o executável do Postman
+        # O executável fica em INSTALL_DIR/current/Postman/Postman
+        executable_path = self.versions.executable("Postman", "Postman")
+        if os.path.realpath(self.SYMLINK_PATH) != os.path.realpath(executable_path):
+            with lock(USR_LOCAL_BIN):
+                subprocess.run(["ln", "-sf", executable_path, self.SYMLINK_PATH], check=True)
+                self.logger.debug("Symlink criado: %s -> %s", self.SYMLINK_PATH, executable_path)
+
+        self.versions.gc()
+        return True
+
     def update(self):
         self.logger.info("Atualizando Postman...")
         try:
-            self.uninstall()
-            self.install()
-            self.logger.info("Postman atualizado com sucesso.")
+            if self.deploy():
+                self.logger.info("Postman atualizado com sucesso.")
         except Exception as e:
+            # A versão anterior continua ativa.
             self.logger.error("Erro ao atualizar Postman: %s", e)
             raise
 
+    def plan(self):
+        # A versão só é conhecida após o download (sha256 do arquivo).
+        step = download(self.DOWNLOAD_URL)
+        return [step] + versioned_deploy(
+            self.versions, "<sha256>", step.path, {self.SYMLINK_PATH: self.versions.executable("Postman", "Postman")}
+        )
+
+    def bundle(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        get_bundle().add_download(self.DOWNLOAD_URL)
+
+    def installed_info(self):
+        return {
+            "version": self.versions.current(),
+            "files": [self.versions.root],
+            "symlinks": [self.SYMLINK_PATH],
+            "packages": self.PACKAGES,
+        }
+
+    def rollback(self):
+        try:
+            version = self.versions.rollback()
+            self.logger.info("Postman revertido para a versão %s.", version)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            self.logger.error("Erro ao reverter Postman: %s", e)
+            raise
+
     def uninstall(self):
         self.logger.info("Desinstalando Postman...")
         try:
             if os.path.exists(self.SYMLINK_PATH):
-                subprocess.run(["rm", "-f", self.SYMLINK_PATH], check=True)
+                with lock(USR_LOCAL_BIN):
+                    subprocess.run(["rm", "-f", self.SYMLINK_PATH], check=True)
                 self.logger.debug("Symlink %s removido.", self.SYMLINK_PATH)
             else:
                 self.logger.info("Symlink %s não encontrado.", self.SYMLINK_PATH)
@@ -1,56 +1,105 @@
 import os
+import shutil
 import subprocess
 
 from base_installer import BaseInstaller
+from config import TERMINAL
+from scheduler import lock
+from download_cache import DownloadError, get_cache
+from releases import ApacheDistRelease, get_resolver
+from planner import Prompt
 
 
 class TomcatInstaller(BaseInstaller):
-    AVAILABLE_VERSIONS = ["9.0.102", "10.1.39"]
+
+    """
+    Versões principais oferecidas; a versão de cada uma é a mais recente publicada no
+    dist da Apache.
+    """
+    MAJOR_VERSIONS = ["9", "10"]
 
     INSTALL_DIR = "~/Programs"
 
-    def install(self):
+    def sources(self):
+        return {
+            major: ApacheDistRelease(f"tomcat/tomcat-{major}", "bin/apache-tomcat-{version}.tar.gz")
+            for major in self.MAJOR_VERSIONS
+        }
 
-        format_version_list = "\n".join([f"{i + 1}. Tomcat {v}" for i, v in enumerate(self.AVAILABLE_VERSIONS)])
-        print(format_version_list)
+    def releases(self):
+        """Consulta em paralelo a versão mais recente de cada versão principal."""
+        releases = get_resolver().resolve_many(self.sources())
+        return [releases[major] for major in self.MAJOR_VERSIONS if major in releases]
 
-        try:
-            version = int(input("Selecione uma versão: ").strip());
+    def plan(self):
+        # O download e o diretório de instalação dependem da versão escolhida.
+        return [Prompt("Selecione uma versão", tuple(f"Tomcat {r['version']}" for r in self.releases()))]
 
-            if not (1 < version <= len(self.AVAILABLE_VERSIONS)):
-                raise ValueError
+    def bundle(self):
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from bundle import get_bundle
+        for source in self.sources().values():
+            get_bundle().add_release(source)
 
-            version = self.AVAILABLE_VERSIONS[version - 1]
+    def install(self):
+        available = self.releases()
+        if not available:
+            self.logger.error("Nenhuma versão do Apache Tomcat disponível.")
+            raise DownloadError("Nenhuma versão do Apache Tomcat disponível")
 
-        except (ValueError, IndexError):
-            self.logger.error("Versão inválida.")
-            return
+        with lock(TERMINAL):
+            format_version_list = "\n".join([f"{i + 1}. Tomcat {r['version']}" for i, r in enumerate(available)])
+            print(format_version_list)
 
-        if version not in self.AVAILABLE_VERSIONS:
-            self.logger.error("Versão não suportada: %s", version)
-            return
+            try:
+                version = int(input("Selecione uma versão: ").strip());
 
+                if not (1 <= version <= len(available)):
+                    raise ValueError
+
+                release = available[version - 1]
+
+            except (ValueError, IndexError, EOFError) as e:
+                # Sem versão escolhida nada é instalado; o erro impede o registro no estado.
+                self.logger.error("Versão inválida.")
+                raise ValueError("Versão do Apache Tomcat inválida ou não informada") from e
+
+        version = release["version"]
         self.logger.info("Instalando Apache Tomcat versão %s...", version)
 
         try:
-            major_version = version.split(".")[0]
-            download_url = f"https://dlcdn.apache.org/tomcat/tomcat-{major_version}/v{version}/bin/apache-tomcat-{version}.tar.gz"
-            subprocess.run(["wget", download_url, "-O", f"/tmp/tomcat-{version}.tar.gz"], check=True)
+            staging_dir = get_cache().extract(
+                release["url"],
+                strip_components=1,
+                version=version,
+                checksum_url=release["checksum_url"],
+                algorithm=release["algorithm"]
+            )
 
             full_install_dir = os.path.expanduser(self.INSTALL_DIR)
             if not os.path.exists(full_install_dir):
                 os.makedirs(full_install_dir, exist_ok=True)
                 self.logger.info("Diretório %s criado.", full_install_dir)
 
-            subprocess.run(["tar", "xzf", f"/tmp/tomcat-{version}.tar.gz", "-C", full_install_dir], check=True)
+            tomcat_dir = f"{full_install_dir}/tomcat-{version}"
+            if os.path.exists(tomcat_dir):
+                shutil.rmtree(tomcat_dir)
+            shutil.move(staging_dir, tomcat_dir)
+            self.version = version
 
             self.logger.info("Apache Tomcat versão %s instalado com sucesso em %s.", version,
                              f"{full_install_dir}/tomcat-{version}")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, DownloadError, OSError) as e:
             self.logger.error("Erro ao instalar Apache Tomcat: %s", e)
             self.uninstall()
             raise
 
+    def installed_info(self):
+        # Sem versão (ex.: 'update', que não é suportado) não há o que registrar.
+        if not self.version:
+            return None
+        return {"version": self.version, "files": [f"{self.INSTALL_DIR}/tomcat-{self.version}"]}
+
     def update(self):
         self.logger.info("Atualização não suportada para Apache Tomcat.")
 
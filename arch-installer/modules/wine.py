@@ -1,19 +1,35 @@
 import subprocess
 
 from base_installer import BaseInstaller
-from config import PACKAGE_MANAGER
+from config import package_manager, PACMAN_DB, TERMINAL
+from scheduler import lock
+from packages import install_packages, remove_packages
+from planner import Command, PackageTransaction
 
 
 class WineInstaller(BaseInstaller):
-    DEPENDENCIES = ["wine", "winetricks", "wine-mono", "wine_gecko", "bottles"]
+
+    PACKAGES = ["wine", "winetricks", "wine-mono", "wine_gecko", "bottles"]
+
+    def prepare(self):
+        # Habilita repositório multilib (caso necessário)
+        with lock(PACMAN_DB):
+            subprocess.run(["sudo", "sed", "-i", "/\\[multilib\\]/,/Include/s/^#//", "/etc/pacman.conf"], check=True)
+
+    def plan(self):
+        return [
+            Command(("sudo", "sed", "-i", "/\\[multilib\\]/,/Include/s/^#//", "/etc/pacman.conf")),
+            PackageTransaction(tuple(self.PACKAGES)),
+            Command(("winecfg",)),
+        ]
 
     def install(self):
         self.logger.info("Instalando Wine e dependências...")
         try:
-            # Habilita repositório multilib (caso necessário)
-            subprocess.run(["sudo", "sed", "-i", "/\\[multilib\\]/,/Include/s/^#//", "/etc/pacman.conf"], check=True)
-            subprocess.run([PACKAGE_MANAGER, "-Sy", "--needed"] + self.DEPENDENCIES + ["--noconfirm"], check=True)
-            subprocess.run(["winecfg"], check=True)
+            self.prepare()
+            install_packages(self.PACKAGES)
+            with lock(TERMINAL):
+                subprocess.run(["winecfg"], check=True)
 
             self.logger.info("Wine e dependências instalados com sucesso.")
         except subprocess.CalledProcessError as e:
@@ -23,8 +39,14 @@ class WineInstaller(BaseInstaller):
 
     def update(self):
         self.logger.info("Atualizando Wine e dependências...")
+        # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+        from releases import outdated_packages
         try:
-            subprocess.run([PACKAGE_MANAGER, "-Syu"] + self.DEPENDENCIES + ["--noconfirm"], check=True)
+            if not outdated_packages(self.PACKAGES):
+                self.logger.info("Wine e dependências já estão na versão mais recente.")
+                return
+            with lock(PACMAN_DB):
+                subprocess.run([package_manager(), "-Syu"] + self.PACKAGES + ["--noconfirm"], check=True)
             self.logger.info("Wine e dependências atualizados com sucesso.")
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao atualizar Wine: %s", e)
@@ -33,14 +55,7 @@ class WineInstaller(BaseInstaller):
     def uninstall(self):
         self.logger.info("Desinstalando Wine e dependências...")
         try:
-            for pkg in self.DEPENDENCIES:
-                result = subprocess.run([PACKAGE_MANAGER, "-Qi", pkg], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-                if result.returncode == 0:
-                    subprocess.run([PACKAGE_MANAGER, "-Rns", pkg, "--noconfirm"], check=True)
-                    self.logger.info("%s desinstalado com sucesso.", pkg)
-                else:
-                    self.logger.info("%s não está instalado, ignorando...", pkg)
+            remove_packages(self.PACKAGES)
         except subprocess.CalledProcessError as e:
             self.logger.error("Erro ao desinstalar Wine e dependências: %s", e)
             raise
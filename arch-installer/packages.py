@@ -0,0 +1,122 @@
+import logging
+import subprocess
+import threading
+
+from config import package_manager
+
+# Estado da transação de pacotes, compartilhado por todos os instaladores do processo.
+_lock = threading.Lock()
+_synced = False
+_query = None
+
+# Bundle offline em uso (ver bundle.py): os pacotes são instalados a partir dos seus arquivos.
+_bundle = None
+
+logger = logging.getLogger("PackageTransaction")
+
+
+def _query_packages(packages=()):
+    result = subprocess.run([package_manager(), "-Q"] + list(packages), capture_output=True, text=True)
+    return dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+
+
+def _installed_packages():
+    global _query
+    if _query is None:
+        _query = _query_packages()
+    return _query
+
+
+def installed_packages():
+    """
+    Retorna {pacote: versão} de todos os pacotes instalados. O gerenciador de pacotes
+    é consultado com um único '-Q' por execução; as alterações feitas por
+    install_packages() e remove_packages() são aplicadas ao resultado memorizado.
+    """
+    with _lock:
+        return dict(_installed_packages())
+
+
+def is_package_installed(package):
+    with _lock:
+        return package in _installed_packages()
+
+
+def database_lock():
+    """
+    Lock das transações do gerenciador de pacotes, para comandos executados fora deste
+    módulo (ver scheduler.lock()). Não deve ser mantido durante chamadas a este módulo.
+    """
+    return _lock
+
+
+def use_bundle(bundle):
+    """
+    Instala os pacotes a partir dos arquivos de 'bundle' ('-U'), sem sincronizar a base
+    de dados nem acessar a rede.
+    """
+    global _bundle
+    with _lock:
+        _bundle = bundle
+
+
+def sync_database():
+    """
+    Sincroniza ('-Sy') a base de dados de pacotes, no máximo uma vez por execução.
+    Lança subprocess.CalledProcessError em caso de falha.
+    """
+    global _synced
+
+    with _lock:
+        if not _synced and _bundle is None:
+            subprocess.run([package_manager(), "-Sy"], check=True)
+            _synced = True
+
+
+def install_packages(packages):
+    """
+    Instala os pacotes ainda não instalados em uma única transação '--needed'.
+    Lança subprocess.CalledProcessError em caso de falha.
+
+    A base de dados é sincronizada ('-Sy') no máximo uma vez por execução. Quando o
+    InstallScheduler instala de uma só vez os pacotes de todos os programas
+    selecionados, as chamadas feitas depois por cada instalador não repetem a
+    resolução de dependências nem o lock do banco de dados.
+    """
+    global _synced
+
+    with _lock:
+        installed = _installed_packages()
+        pending = [pkg for pkg in dict.fromkeys(packages) if pkg not in installed]
+        if not pending:
+            return
+
+        logger.info("Instalando pacotes: %s", " ".join(pending))
+        if _bundle is not None:
+            subprocess.run([package_manager(), "-U", "--needed"] + _bundle.package_files(pending) + ["--noconfirm"],
+                           check=True)
+        else:
+            operation = "-S" if _synced else "-Sy"
+            subprocess.run([package_manager(), operation, "--needed"] + pending + ["--noconfirm"], check=True)
+            _synced = True
+        installed.update(_query_packages(pending))
+
+
+def remove_packages(packages):
+    """
+    Remove (com '-Rns') os pacotes instalados dentre 'packages' em uma única transação.
+    Lança subprocess.CalledProcessError em caso de falha.
+    """
+    with _lock:
+        installed = _installed_packages()
+        present = [pkg for pkg in dict.fromkeys(packages) if pkg in installed]
+        for pkg in packages:
+            if pkg not in installed:
+                logger.info("%s não está instalado, ignorando...", pkg)
+        if not present:
+            return
+
+        logger.info("Removendo pacotes: %s", " ".join(present))
+        subprocess.run([package_manager(), "-Rns"] + present + ["--noconfirm"], check=True)
+        for pkg in present:
+            installed.pop(pkg, None)
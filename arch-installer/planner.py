@@ -0,0 +1,275 @@
+import re
+import statistics
+import subprocess
+from dataclasses import dataclass
+
+from config import package_manager
+from packages import installed_packages
+
+# O cache de downloads e o resolvedor de releases são importados sob demanda, nas
+# funções que os usam: os módulos carregam o 'requests' (ver registry.py).
+
+# Vazão, em bytes/s, usada nas estimativas de tempo quando o cache ainda não tem
+# downloads registrados.
+DEFAULT_THROUGHPUT = 5 * 1000 ** 2
+
+SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+
+
+@dataclass(frozen=True)
+class Download:
+    url: str
+    size: int = None
+    cached: bool = False
+    path: str = None
+    kind = "download"
+
+    def describe(self):
+        return self.url + (" (em cache)" if self.cached else "")
+
+
+@dataclass(frozen=True)
+class PackageTransaction:
+    packages: tuple
+    kind = "pacotes"
+
+    def describe(self):
+        return " ".join(self.packages)
+
+
+@dataclass(frozen=True)
+class Extract:
+    source: str
+    destination: str
+    member: str = None
+    kind = "extrair"
+
+    def describe(self):
+        source = f"{self.source}:{self.member}" if self.member else self.source
+        return f"{source} -> {self.destination}"
+
+
+@dataclass(frozen=True)
+class Symlink:
+    link: str
+    target: str
+    kind = "symlink"
+
+    @property
+    def destination(self):
+        return self.link
+
+    def describe(self):
+        return f"{self.link} -> {self.target}"
+
+
+@dataclass(frozen=True)
+class Move:
+    source: str
+    destination: str
+    kind = "mover"
+
+    def describe(self):
+        return f"{self.source} -> {self.destination}"
+
+
+@dataclass(frozen=True)
+class Copy:
+    source: str
+    destination: str
+    kind = "copiar"
+
+    def describe(self):
+        return f"{self.source} -> {self.destination}"
+
+
+@dataclass(frozen=True)
+class Clone:
+    url: str
+    destination: str
+    kind = "clonar"
+
+    def describe(self):
+        return f"{self.url} -> {self.destination}"
+
+
+@dataclass(frozen=True)
+class Prompt:
+    question: str
+    choices: tuple
+    kind = "escolha"
+
+    def describe(self):
+        return f"{self.question}: {' | '.join(self.choices)}"
+
+
+@dataclass(frozen=True)
+class Command:
+    args: tuple
+    kind = "comando"
+
+    def describe(self):
+        return " ".join(self.args)
+
+
+def download(url, version=None, size=None):
+    """
+    Etapa de download de 'url', marcada como em cache se já estiver no cache de
+    downloads. 'path' é o arquivo no cache usado pelas etapas seguintes.
+    """
+    from download_cache import get_cache
+    cache = get_cache()
+    entry = cache.lookup(url, version)
+    if entry:
+        return Download(url, entry["size"], cached=True, path=cache.path_for(url, version))
+    return Download(url, size, path=cache.path_for(url, version))
+
+
+def release_download(source):
+    """
+    Etapa de download do release mais recente de 'source' (ver releases.py) e a versão
+    resolvida. Lança DownloadError se a versão não puder ser consultada.
+    """
+    from releases import get_resolver
+    release = get_resolver().resolve(source)
+    return download(release["url"], release["version"], release["size"]), release["version"]
+
+
+def versioned_deploy(versions, version, path, links=None):
+    """
+    Etapas de uma instalação em VersionedInstall (ver versions.py): extração do arquivo
+    'path' do cache na versão, troca do link 'current' e symlinks externos {link:
+    caminho na versão ativa}.
+    """
+    steps = [
+        Extract(path, versions.path(version)),
+        Symlink(versions.current_link, versions.path(version)),
+    ]
+    return steps + [Symlink(link, target) for link, target in (links or {}).items()]
+
+
+class Planner:
+    """
+    Plano de execução (dry-run) de uma instalação: as etapas de cada instalador, obtidas
+    com plan() sem executar nada, na ordem do grafo do InstallScheduler.
+
+    Etapas iguais de programas diferentes (por exemplo, a instalação do nvim pelo NvChad
+    e pelo AstroVim) aparecem uma única vez, e as transações de pacotes são reunidas em
+    uma só, como o InstallScheduler faz. As estimativas usam o tamanho dos arquivos
+    informado pelas fontes de releases e pelo cache, o 'Download Size' da base de dados
+    de pacotes e a vazão mediana dos downloads registrados no cache.
+    """
+
+    def __init__(self, registry, graph, debug=False):
+        self.registry = registry
+        self.graph = graph
+        self.debug = debug
+
+    def order(self):
+        order = []
+
+        def visit(name):
+            if name in order:
+                return
+            for dep in self.graph[name]:
+                visit(dep)
+            order.append(name)
+
+        for name in self.graph:
+            visit(name)
+        return order
+
+    def steps(self):
+        """Retorna [(etapa, [programas])] sem etapas repetidas."""
+        steps = {}
+        packages = []
+        for name in self.order():
+            for step in self.registry[name](debug=self.debug).plan():
+                if isinstance(step, PackageTransaction):
+                    # As transações são reunidas na posição da primeira.
+                    installed = installed_packages()
+                    packages += [pkg for pkg in step.packages if pkg not in installed and pkg not in packages]
+                    step = PackageTransaction(())
+                steps.setdefault(step, []).append(name)
+
+        result = []
+        for step, names in steps.items():
+            if isinstance(step, PackageTransaction):
+                if not packages:
+                    continue
+                step = PackageTransaction(tuple(packages))
+            result.append((step, list(dict.fromkeys(names))))
+        return result
+
+    def estimate(self, step):
+        """Bytes a baixar na etapa, ou None se desconhecido."""
+        if isinstance(step, Download):
+            return 0 if step.cached else step.size
+        if isinstance(step, PackageTransaction):
+            return package_download_size(step.packages)
+        return 0
+
+    @staticmethod
+    def conflicts(steps):
+        """
+        Retorna {destino: [programas]} com os caminhos gravados por etapas diferentes de
+        programas diferentes, por exemplo, os clones do NvChad e do AstroVim em
+        ~/.config/nvim.
+        """
+        writers = {}
+        for step, names in steps:
+            destination = getattr(step, "destination", None)
+            if destination is not None:
+                writers.setdefault(destination, []).append(names)
+        return {
+            destination: list(dict.fromkeys(name for names in groups for name in names))
+            for destination, groups in writers.items()
+            if any(set(names) != set(groups[0]) for names in groups)
+        }
+
+    @staticmethod
+    def throughput():
+        from download_cache import get_cache
+        throughputs = get_cache().throughputs()
+        return statistics.median(throughputs) if throughputs else DEFAULT_THROUGHPUT
+
+
+def package_download_size(packages):
+    """
+    Soma do 'Download Size' dos pacotes na base de dados sincronizada, ou None se algum
+    pacote não for encontrado (por exemplo, pacotes do AUR).
+    """
+    if not packages:
+        return 0
+    try:
+        result = subprocess.run([package_manager(), "-Si"] + list(packages), capture_output=True, text=True)
+    except EnvironmentError:
+        return None
+    sizes = re.findall(r"^Download Size\s*:\s*([\d.,]+)\s*(\w+)", result.stdout, re.MULTILINE)
+    if result.returncode != 0 or len(sizes) < len(packages):
+        return None
+    return int(sum(float(value.replace(",", ".")) * SIZE_UNITS.get(unit, 1) for value, unit in sizes))
+
+
+def print_plan(planner):
+    """Exibe o plano e retorna os conflitos encontrados (ver Planner.conflicts())."""
+    steps = planner.steps()
+    total = 0
+    unknown = False
+    for i, (step, names) in enumerate(steps, 1):
+        size = planner.estimate(step)
+        if size is None:
+            unknown = True
+        total += size or 0
+        size_text = "?" if size is None else f"{size / 1e6:.1f} MB" if size else ""
+        print(f"{i:>3}. [{step.kind}] {step.describe()}  {size_text}".rstrip()
+              + f"  ({', '.join(names)})")
+
+    throughput = planner.throughput()
+    print(f"Total: {total / 1e6:.1f} MB a baixar{' (mais tamanhos desconhecidos)' if unknown else ''}, "
+          f"~{total / throughput:.0f} s a {throughput / 1e6:.1f} MB/s")
+
+    conflicts = planner.conflicts(steps)
+    for destination, names in conflicts.items():
+        print(f"Conflito: {destination} é gravado por {', '.join(names)}")
+    return conflicts
@@ -1,2 +1,14 @@
 source venv/bin/activate
-pyinstaller --onefile cli.py --name arch-installer
\ No newline at end of file
+
+# Os instaladores são importados sob demanda (ver registry.py), por isso o pacote
+# 'modules' é incluído explicitamente.
+#
+# Modo padrão (--onefile): um único executável, que a cada execução descompacta o
+# Python e as dependências em um diretório temporário antes de iniciar.
+#
+# Modo rápido (BUILD_MODE=onedir ./pyinstaller.sh): gera dist/arch-installer/ com o
+# executável e as bibliotecas já descompactadas, sem esse custo na inicialização.
+# O diretório inteiro precisa ser copiado para a máquina de destino.
+BUILD_MODE=${BUILD_MODE:-onefile}
+
+pyinstaller --$BUILD_MODE --collect-submodules modules cli.py --name arch-installer
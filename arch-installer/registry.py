@@ -0,0 +1,51 @@
+"""
+Instaladores disponíveis no CLI: nome do programa -> "módulo:classe". O módulo só é
+importado quando o programa é usado, de modo que o CLI não carrega 'requests' nem os
+demais instaladores para gerenciar um único programa.
+
+Ao empacotar com o PyInstaller, os módulos precisam ser incluídos explicitamente
+(ver pyinstaller.sh), pois não são importados diretamente.
+"""
+import importlib
+from collections.abc import Mapping
+
+INSTALLERS = {
+    "chrome": "modules.chrome:ChromeInstaller",
+    "jetbrains": "modules.jetbrains:JetbrainsInstaller",
+    "filezilla": "modules.filezilla:FilezillaInstaller",
+    "tomcat": "modules.tomcat:TomcatInstaller",
+    "wine": "modules.wine:WineInstaller",
+    "postman": "modules.postman:PostmanInstaller",
+    "nvim": "modules.nvim:NvimInstaller",
+    "nvchad": "modules.nvim_nvchad:NvChadInstaller",
+    "astrovim": "modules.nvim_astrovim:AstroVimInstaller",
+    "docker": "modules.docker:DockerInstaller",
+    "mise": "modules.mise:MiseInstaller",
+    "gdu": "modules.gdu:GduInstaller",
+}
+
+
+class InstallerRegistry(Mapping):
+    """
+    Mapeamento {programa: classe do instalador} que importa cada módulo no primeiro
+    acesso à classe. Consultar os nomes (iteração, 'in', len) não importa nada.
+    """
+
+    def __init__(self, installers=INSTALLERS):
+        self.installers = installers
+        self.classes = {}
+
+    def __getitem__(self, name):
+        if name not in self.classes:
+            module_name, class_name = self.installers[name].split(":")
+            self.classes[name] = getattr(importlib.import_module(module_name), class_name)
+        return self.classes[name]
+
+    def __iter__(self):
+        return iter(self.installers)
+
+    def __len__(self):
+        return len(self.installers)
+
+    def __contains__(self, name):
+        return name in self.installers
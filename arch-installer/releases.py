@@ -0,0 +1,278 @@
+import os
+import re
+import json
+import time
+import fcntl
+import logging
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import CACHE_DIR, RELEASES_TTL, package_manager
+from download_cache import DownloadError
+from packages import installed_packages, sync_database
+
+APACHE_DIST = "https://dlcdn.apache.org"
+
+
+def _version_key(version):
+    return [int(part) if part.isdigit() else part for part in re.split(r"[.-]", version)]
+
+
+class JetBrainsRelease:
+    """
+    Última versão de um produto no serviço de dados da JetBrains.
+    Referência: https://github.com/nagygergo/jetbrains-toolbox-install/blob/master/jetbrains-toolbox.sh
+    """
+    ttl = RELEASES_TTL
+
+    def __init__(self, code, platform="linux"):
+        self.code = code
+        self.platform = platform
+        self.key = f"jetbrains:{code}:{platform}"
+
+    def fetch(self, session):
+        response = session.get(
+            "https://data.services.jetbrains.com/products/releases",
+            params={"code": self.code, "latest": "true", "type": "release"},
+            timeout=30
+        )
+        response.raise_for_status()
+        release = response.json()[self.code][0]
+        download = release["downloads"][self.platform]
+        return {
+            "version": release["build"],
+            "url": download["link"],
+            "size": download.get("size"),
+            "checksum": None,
+            "checksum_url": download.get("checksumLink"),
+            "algorithm": "sha256",
+        }
+
+
+class GitHubRelease:
+    """
+    Último release de um repositório no GitHub. 'asset' é o nome do arquivo publicado no
+    release e pode conter '{tag}' e '{version}' (a tag sem o 'v' inicial).
+
+    A API sem autenticação aceita 60 requisições por hora; com a variável GITHUB_TOKEN
+    o limite é maior.
+    """
+    ttl = RELEASES_TTL
+
+    def __init__(self, repository, asset):
+        self.repository = repository
+        self.asset = asset
+        self.key = f"github:{repository}:{asset}"
+
+    def fetch(self, session):
+        headers = {"Accept": "application/vnd.github+json"}
+        if os.environ.get("GITHUB_TOKEN"):
+            headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+        response = session.get(
+            f"https://api.github.com/repos/{self.repository}/releases/latest", headers=headers, timeout=30
+        )
+        response.raise_for_status()
+        release = response.json()
+
+        tag = release["tag_name"]
+        version = tag[1:] if tag.startswith("v") else tag
+        name = self.asset.format(tag=tag, version=version)
+        asset = next((asset for asset in release["assets"] if asset["name"] == name), None)
+        if asset is None:
+            raise KeyError(f"{name} não encontrado no release {tag} de {self.repository}")
+
+        # O GitHub informa o sha256 dos arquivos publicados a partir de 2025 ('digest').
+        digest = asset.get("digest") or ""
+        return {
+            "version": version,
+            "url": asset["browser_download_url"],
+            "size": asset.get("size"),
+            "checksum": digest.split(":", 1)[1] if digest.startswith("sha256:") else None,
+            "checksum_url": None,
+            "algorithm": "sha256",
+        }
+
+
+class ApacheDistRelease:
+    """
+    Versão mais recente publicada em um diretório do dist da Apache (por exemplo,
+    'tomcat/tomcat-10', com um subdiretório 'v<versão>/' por versão). O CDN mantém
+    apenas as versões suportadas, por isso a versão não pode ser fixada no código.
+
+    'path' é o caminho do arquivo dentro do diretório da versão e pode conter '{version}'.
+    """
+    ttl = RELEASES_TTL
+
+    def __init__(self, directory, path):
+        self.directory = directory
+        self.path = path
+        self.key = f"apache:{directory}:{path}"
+
+    def fetch(self, session):
+        response = session.get(f"{APACHE_DIST}/{self.directory}/", timeout=30)
+        response.raise_for_status()
+        versions = set(re.findall(r'href="v(\d[\w.-]*)/"', response.text))
+        if not versions:
+            raise ValueError(f"Nenhuma versão encontrada em {APACHE_DIST}/{self.directory}/")
+
+        version = max(versions, key=_version_key)
+        url = f"{APACHE_DIST}/{self.directory}/v{version}/{self.path.format(version=version)}"
+        # A Apache publica o SHA-512 de cada arquivo em '<url>.sha512'.
+        return {
+            "version": version,
+            "url": url,
+            "size": None,
+            "checksum": None,
+            "checksum_url": f"{url}.sha512",
+            "algorithm": "sha512",
+        }
+
+
+class PacmanRelease:
+    """
+    Versão de um pacote nos repositórios (ou no AUR, com paru/yay). A base de dados é
+    sincronizada uma vez por execução e o resultado não é mantido em cache entre execuções.
+    """
+    ttl = 0
+
+    def __init__(self, package):
+        self.package = package
+        self.key = f"pacman:{package}"
+
+    def fetch(self, session):
+        sync_database()
+        result = subprocess.run([package_manager(), "-Si", self.package], capture_output=True, text=True, check=True)
+        match = re.search(r"^Version\s*:\s*(\S+)", result.stdout, re.MULTILINE)
+        if match is None:
+            raise ValueError(f"Versão de {self.package} não encontrada")
+        return {"version": match.group(1), "url": None, "size": None,
+                "checksum": None, "checksum_url": None, "algorithm": None}
+
+
+class ReleaseResolver:
+    """
+    Resolve a versão mais recente (e a URL de download) dos programas a partir de fontes
+    de releases: JetBrainsRelease, GitHubRelease, ApacheDistRelease e PacmanRelease.
+
+    Cada fonte é um objeto com 'key', 'ttl' e fetch(session) -> release, em que release
+    é um dicionário com "version", "url", "size", "checksum", "checksum_url" e
+    "algorithm" (os argumentos de DownloadCache.fetch()).
+
+    Os resultados ficam em 'releases.json' no diretório do cache durante 'ttl' segundos,
+    de modo que várias execuções seguidas não repetem as consultas. Se a consulta
+    falhar, o último resultado conhecido é usado, mesmo que expirado.
+
+    offline: usa apenas os resultados em cache, sem considerar o 'ttl' (ver bundle.py).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, offline=False):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.offline = offline
+        self.cache_path = os.path.join(self.cache_dir, "releases.json")
+        self.session = requests.Session()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _update_cache(self, update=None):
+        """
+        Lê o cache de releases com lock exclusivo (entre threads e processos) e, se
+        'update' for informado, grava as entradas {chave: entrada} recebidas.
+        """
+        with self._lock, open(os.path.join(self.cache_dir, "releases.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                entries = {}
+                if os.path.exists(self.cache_path):
+                    with open(self.cache_path, "r") as f:
+                        try:
+                            entries = json.load(f)
+                        except json.JSONDecodeError:
+                            entries = {}
+                if update:
+                    entries.update(update)
+                    tmp_path = self.cache_path + ".tmp"
+                    with open(tmp_path, "w") as f:
+                        json.dump(entries, f, indent=2, sort_keys=True)
+                    os.replace(tmp_path, self.cache_path)
+                return entries
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def resolve(self, source):
+        """
+        Retorna o release mais recente de 'source'.
+        Lança DownloadError se a consulta falhar e não houver resultado anterior.
+        """
+        entry = self._update_cache().get(source.key) if source.ttl else None
+        if entry and (self.offline or time.time() - entry["resolved_at"] < source.ttl):
+            self.logger.debug("Release em cache: %s (%s)", source.key, entry["release"]["version"])
+            return entry["release"]
+        if self.offline:
+            raise DownloadError(f"Versão de {source.key} não está disponível no cache offline {self.cache_dir}")
+
+        try:
+            release = source.fetch(self.session)
+        except (requests.exceptions.RequestException, subprocess.CalledProcessError,
+                ValueError, KeyError, IndexError) as e:
+            if entry:
+                self.logger.warning("Erro ao consultar %s (%s), usando a versão %s consultada anteriormente.",
+                                    source.key, e, entry["release"]["version"])
+                return entry["release"]
+            raise DownloadError(f"Erro ao consultar a versão mais recente de {source.key}: {e}") from e
+
+        self.logger.debug("Release resolvido: %s (%s)", source.key, release["version"])
+        if source.ttl:
+            self._update_cache({source.key: {"release": release, "resolved_at": time.time()}})
+        return release
+
+    def resolve_many(self, sources, max_workers=8):
+        """
+        Resolve em paralelo as fontes {nome: fonte} e retorna {nome: release}. Nomes cuja
+        consulta falhou são registrados no log e omitidos do resultado.
+        """
+        releases = {}
+        if not sources:
+            return releases
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(sources))) as executor:
+            futures = {name: executor.submit(self.resolve, source) for name, source in sources.items()}
+            for name, future in futures.items():
+                try:
+                    releases[name] = future.result()
+                except DownloadError as e:
+                    self.logger.warning("%s", e)
+        return releases
+
+
+def outdated_packages(packages):
+    """
+    Retorna os pacotes instalados dentre 'packages' cuja versão nos repositórios é
+    diferente da instalada (ou não pôde ser consultada).
+    """
+    installed = installed_packages()
+    present = [pkg for pkg in dict.fromkeys(packages) if pkg in installed]
+    releases = get_resolver().resolve_many({pkg: PacmanRelease(pkg) for pkg in present})
+    return [pkg for pkg in present if pkg not in releases or releases[pkg]["version"] != installed[pkg]]
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Retorna a instância do resolvedor compartilhada pelos instaladores do processo."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ReleaseResolver()
+        return _resolver
+
+
+def use_resolver(resolver):
+    """Substitui a instância compartilhada (por exemplo, pela de um bundle)."""
+    global _resolver
+    with _resolver_lock:
+        _resolver = resolver
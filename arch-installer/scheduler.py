@@ -0,0 +1,199 @@
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import PACMAN_DB
+from packages import database_lock, install_packages
+
+# Locks dos recursos compartilhados (ver config.py), usados por todos os instaladores do processo.
+_lock = threading.Lock()
+_resource_locks = {}
+
+
+@contextmanager
+def lock(resource):
+    """
+    Reserva o recurso compartilhado 'resource' (ver config.py) durante o bloco. Os
+    instaladores envolvem apenas as etapas que disputam o recurso (um symlink em
+    /usr/local/bin, um comando do pacman, a escrita em ~/.config/nvim), de modo que os
+    downloads e as extrações de programas diferentes continuam em paralelo.
+
+    O recurso PACMAN_DB usa o mesmo lock das transações de packages.py.
+    """
+    with _lock:
+        if resource not in _resource_locks:
+            _resource_locks[resource] = database_lock() if resource == PACMAN_DB else threading.Lock()
+        resource_lock = _resource_locks[resource]
+    with resource_lock:
+        yield
+
+
+class InstallScheduler:
+    """
+    Executa a ação de vários instaladores respeitando um grafo de dependências.
+
+    Cada instalador declara em DEPENDS_ON os programas que precisam ser executados
+    antes dele. Programas cujas dependências já terminaram são executados em
+    paralelo; apenas as etapas que disputam um mesmo recurso (por exemplo, o banco
+    de dados do pacman) são serializadas, com lock().
+
+    Na instalação as dependências são incluídas automaticamente e os PACKAGES de
+    todos os programas são instalados antes em uma única transação, de modo que o
+    install() de cada instalador só executa as etapas restantes. Na criação de
+    bundles ('bundle') as dependências também são incluídas. Na desinstalação
+    a ordem é invertida e apenas os programas selecionados são executados.
+
+    Se 'state' (InstalledState) for informado, o resultado de cada ação bem-sucedida
+    é registrado no estado de instalação.
+    """
+
+    def __init__(self, registry, action, debug=False, max_workers=4, state=None):
+        self.registry = registry
+        self.action = action
+        self.state = state
+        self.debug = debug
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.installers = {}
+
+    def dependencies(self, name):
+        return [dep for dep in self.registry[name].DEPENDS_ON if dep in self.registry]
+
+    def plan(self, programs):
+        """
+        Retorna o grafo {programa: dependências} a ser executado.
+        Lança ValueError para programas desconhecidos ou dependências cíclicas.
+        """
+        for name in programs:
+            if name not in self.registry:
+                raise ValueError(f"Programa não encontrado: {name}")
+
+        selected = list(dict.fromkeys(programs))
+        if self.action in ("install", "bundle"):
+            pending = list(selected)
+            while pending:
+                for dep in self.dependencies(pending.pop()):
+                    if dep not in selected:
+                        selected.append(dep)
+                        pending.append(dep)
+
+        graph = {name: [dep for dep in self.dependencies(name) if dep in selected] for name in selected}
+        if self.action == "uninstall":
+            reverse = {name: [] for name in selected}
+            for name, deps in graph.items():
+                for dep in deps:
+                    reverse[dep].append(name)
+            graph = reverse
+
+        self._check_cycles(graph)
+        return graph
+
+    def _check_cycles(self, graph):
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visiting:
+                raise ValueError("Dependência cíclica: " + " -> ".join(path + [name]))
+            if name in visited:
+                return
+            visiting.add(name)
+            for dep in graph[name]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in graph:
+            visit(name, [])
+
+    def _execute(self, name):
+        self.logger.debug("Executando '%s' em %s", self.action, name)
+        installer = self.installers.get(name) or self.registry[name](debug=self.debug)
+        getattr(installer, self.action)()
+        if self.state is not None:
+            if self.action == "uninstall":
+                self.state.remove(name)
+            else:
+                info = installer.installed_info()
+                if info is not None:
+                    self.state.record(name, **info)
+
+    def run(self, programs):
+        """
+        Executa a ação nos programas e retorna {programa: "ok" | "erro" | "ignorado"}.
+        Se um programa falhar, os que dependem dele são ignorados.
+        """
+        graph = self.plan(programs)
+        if self.action in ("install", "update"):
+            self._resolve_releases(graph)
+        if self.action == "install":
+            self._install_packages(graph)
+        remaining = {name: set(deps) for name, deps in graph.items()}
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while remaining or running:
+                for name in [n for n, deps in remaining.items() if not deps]:
+                    del remaining[name]
+                    running[executor.submit(self._execute, name)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                        results[name] = "ok"
+                    except Exception as e:
+                        self.logger.error("Falha em %s: %s", name, e)
+                        results[name] = "erro"
+
+                    for other, deps in list(remaining.items()):
+                        if name not in deps:
+                            continue
+                        if results[name] == "ok":
+                            deps.discard(name)
+                        else:
+                            self._skip(other, remaining, results)
+
+        return results
+
+    def _resolve_releases(self, graph):
+        """
+        Consulta em paralelo a versão mais recente dos programas planejados. Os
+        instaladores encontram o resultado no cache do resolvedor.
+        """
+        sources = {name: self.registry[name].RELEASE for name in graph if self.registry[name].RELEASE}
+        if sources:
+            # Importado sob demanda: o módulo carrega o 'requests' (ver registry.py).
+            from releases import get_resolver
+            get_resolver().resolve_many(sources)
+
+    def _install_packages(self, graph):
+        """
+        Instala em uma única transação os pacotes de todos os programas planejados.
+        Em caso de falha, cada instalador volta a instalar os próprios pacotes.
+        """
+        self.installers = {name: self.registry[name](debug=self.debug) for name in graph}
+        packages = [pkg for installer in self.installers.values() for pkg in installer.PACKAGES]
+        if not packages:
+            return
+        try:
+            for installer in self.installers.values():
+                installer.prepare()
+            install_packages(packages)
+        except Exception as e:
+            self.logger.warning("Falha na transação de pacotes, instalando por programa: %s", e)
+
+    def _skip(self, name, remaining, results):
+        if name not in remaining:
+            return
+        del remaining[name]
+        results[name] = "ignorado"
+        self.logger.warning("%s ignorado porque uma dependência falhou.", name)
+        for other, deps in list(remaining.items()):
+            if name in deps:
+                self._skip(other, remaining, results)
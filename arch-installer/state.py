@@ -0,0 +1,113 @@
+import os
+import time
+import sqlite3
+import threading
+
+from config import STATE_DIR
+from packages import installed_packages
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    name TEXT PRIMARY KEY,
+    version TEXT,
+    installed_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    program TEXT NOT NULL REFERENCES programs(name) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (program, kind, path)
+);
+"""
+
+# Tipos de artefato registrados para cada programa.
+FILE = "file"
+SYMLINK = "symlink"
+PACKAGE = "package"
+
+ARTIFACT_KEYS = {FILE: "files", SYMLINK: "symlinks", PACKAGE: "packages"}
+
+
+class InstalledState:
+    """
+    Estado dos programas instalados por este script, em um banco SQLite em
+    ~/.local/state/arch-installer/state.db.
+
+    Para cada programa são registrados a versão e os artefatos criados (arquivos ou
+    diretórios, symlinks e pacotes). A consulta de estado confere os arquivos com
+    'lstat' e os pacotes com uma única consulta '-Q' ao gerenciador de pacotes, sem
+    executar nenhum comando por programa.
+    """
+
+    def __init__(self, state_dir=STATE_DIR):
+        state_dir = os.path.expanduser(state_dir)
+        os.makedirs(state_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(state_dir, "state.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def record(self, name, version=None, files=(), symlinks=(), packages=()):
+        """
+        Registra (ou atualiza) um programa instalado e substitui os seus artefatos.
+        """
+        now = time.time()
+        artifacts = [(name, FILE, os.path.expanduser(path)) for path in files] \
+            + [(name, SYMLINK, os.path.expanduser(path)) for path in symlinks] \
+            + [(name, PACKAGE, package) for package in packages]
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO programs (name, version, installed_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at",
+                (name, version, now, now)
+            )
+            self.connection.execute("DELETE FROM artifacts WHERE program = ?", (name,))
+            self.connection.executemany("INSERT OR IGNORE INTO artifacts VALUES (?, ?, ?)", artifacts)
+
+    def remove(self, name):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM programs WHERE name = ?", (name,))
+
+    def get(self, name):
+        """
+        Retorna {"version", "updated_at", "files", "symlinks", "packages"} ou None se o
+        programa não estiver registrado.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT version, updated_at FROM programs WHERE name = ?", (name,)
+            ).fetchone()
+            if row is None:
+                return None
+            program = {"version": row[0], "updated_at": row[1], **{key: [] for key in ARTIFACT_KEYS.values()}}
+            for kind, path in self.connection.execute(
+                "SELECT kind, path FROM artifacts WHERE program = ? ORDER BY kind, path", (name,)
+            ):
+                program[ARTIFACT_KEYS[kind]].append(path)
+            return program
+
+    def status(self, registry, names):
+        """
+        Confere o estado de cada programa e retorna uma lista de
+        (programa, situação, versão, atualizado em, artefatos ausentes).
+
+        Situações: "instalado", "incompleto" (algum artefato registrado não existe
+        mais), "detectado" (não registrado, mas com todos os pacotes instalados) e
+        "ausente".
+        """
+        packages = installed_packages()
+        result = []
+        for name in names:
+            program = self.get(name)
+            if program is None:
+                declared = registry[name].PACKAGES
+                detected = declared and all(package in packages for package in declared)
+                result.append((name, "detectado" if detected else "ausente", None, None, []))
+                continue
+
+            missing = [path for path in program["files"] + program["symlinks"] if not os.path.lexists(path)]
+            missing += [package for package in program["packages"] if package not in packages]
+            situation = "incompleto" if missing else "instalado"
+            result.append((name, situation, program["version"], program["updated_at"], missing))
+        return result
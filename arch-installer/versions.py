@@ -0,0 +1,112 @@
+import os
+import shutil
+import logging
+import subprocess
+
+from config import KEEP_VERSIONS
+
+
+class VersionedInstall:
+    """
+    Instalação com versões lado a lado:
+
+        <root>/versions/<versão>/    conteúdo de cada versão
+        <root>/current -> versions/<versão>
+
+    Os links de /usr/local/bin apontam para <root>/current/..., de modo que trocar de
+    versão é apenas substituir o link 'current' por um rename atômico: a versão nova é
+    baixada e extraída enquanto a atual continua em uso, e uma falha no download não
+    remove nada. As versões anteriores mais recentes são mantidas para rollback.
+
+    sudo: executa as operações no diretório com 'sudo' (por exemplo, em /opt).
+    """
+
+    def __init__(self, root, sudo=False, keep=KEEP_VERSIONS):
+        self.root = os.path.expanduser(root)
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.current_link = os.path.join(self.root, "current")
+        self.sudo = sudo
+        self.keep = keep
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _run(self, args):
+        subprocess.run((["sudo"] if self.sudo else []) + args, check=True)
+
+    def path(self, version, *parts):
+        return os.path.join(self.versions_dir, version, *parts)
+
+    def executable(self, *parts):
+        """Caminho estável para um arquivo da versão ativa (alvo dos symlinks externos)."""
+        return os.path.join(self.current_link, *parts)
+
+    def current(self):
+        if not os.path.islink(self.current_link):
+            return None
+        return os.path.basename(os.readlink(self.current_link))
+
+    def versions(self):
+        """Versões instaladas, da mais antiga para a mais recente."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        names = [name for name in os.listdir(self.versions_dir) if not name.startswith(".")]
+        return sorted(names, key=lambda name: os.stat(self.path(name)).st_mtime)
+
+    def add(self, staging, version):
+        """
+        Move o diretório 'staging' para versions/<versão>. Se a versão já existir, o
+        staging é descartado.
+        """
+        if os.path.exists(self.root) and not os.path.isdir(self.versions_dir):
+            # Instalação feita por uma versão anterior deste script, sem versões.
+            self.logger.info("Removendo instalação antiga em %s.", self.root)
+            self._run(["rm", "-rf", self.root])
+
+        if os.path.isdir(self.path(version)):
+            shutil.rmtree(staging, ignore_errors=True)
+            return self.path(version)
+
+        # A cópia entre sistemas de arquivos não é atômica; o nome temporário evita
+        # que uma versão incompleta seja considerada instalada.
+        tmp_path = self.path(f".{version}.tmp")
+        self._run(["mkdir", "-p", self.versions_dir])
+        self._run(["rm", "-rf", tmp_path])
+        self._run(["mv", staging, tmp_path])
+        self._run(["touch", tmp_path])
+        self._run(["mv", "-T", tmp_path, self.path(version)])
+        return self.path(version)
+
+    def activate(self, version):
+        """Torna 'version' a versão atual substituindo o link 'current' atomicamente."""
+        if not os.path.isdir(self.path(version)):
+            raise ValueError(f"Versão {version} não instalada em {self.root}")
+        tmp_link = self.current_link + ".tmp"
+        self._run(["ln", "-sfn", os.path.join("versions", version), tmp_link])
+        self._run(["mv", "-T", tmp_link, self.current_link])
+        self.logger.debug("%s -> %s", self.current_link, version)
+
+    def rollback(self):
+        """
+        Ativa a versão instalada imediatamente anterior à atual e a retorna.
+        Lança ValueError se não houver versão anterior.
+        """
+        versions = self.versions()
+        current = self.current()
+        older = versions[:versions.index(current)] if current in versions else versions
+        if not older:
+            raise ValueError(f"Nenhuma versão anterior disponível em {self.root}")
+        self.activate(older[-1])
+        return older[-1]
+
+    def gc(self):
+        """
+        Remove as versões mais antigas, mantendo a atual e as 'keep - 1' mais recentes.
+        """
+        current = self.current()
+        others = [version for version in self.versions() if version != current]
+        for version in others[:max(len(others) - (self.keep - 1), 0)]:
+            self._run(["rm", "-rf", self.path(version)])
+            self.logger.debug("Versão %s removida de %s.", version, self.root)
+
+    def remove(self):
+        if os.path.lexists(self.root):
+            self._run(["rm", "-rf", self.root])
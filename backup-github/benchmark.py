@@ -0,0 +1,340 @@
+"""
+Benchmark do backup de repositórios sem acessar o GitHub.
+
+Sobe um servidor HTTP local que imita '/user/repos' (paginação com cabeçalho 'Link',
+cabeçalhos de rate limit e ETag/304) e '/graphql' (paginação por cursor), gera repositórios bare locais servidos via
+file:// e executa o main() de script.py de ponta a ponta em várias rodadas. Entre as
+rodadas, uma fração dos repositórios recebe novos commits ('--change-rate').
+
+Exemplo:
+    python benchmark.py --repos 500 --rounds 3 --change-rate 0.05 -- --jobs 8
+    python benchmark.py --repos 500 -- --backend graphql
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import script
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@localhost",
+    "GIT_COMMITTER_NAME": "benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@localhost",
+}
+
+
+def git(args, cwd, env=None, input=None):
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        env={**os.environ, **GIT_ENV, **(env or {})},
+        input=input,
+        capture_output=True,
+        check=True
+    )
+    return result.stdout.decode().strip()
+
+
+def add_commit(repo_path, file_size, label):
+    """
+    Cria um commit com um arquivo aleatório de 'file_size' bytes diretamente no
+    repositório bare, usando comandos de baixo nível do Git.
+    """
+    index_file = os.path.join(repo_path, "benchmark.index")
+    env = {"GIT_INDEX_FILE": index_file}
+    try:
+        parent = subprocess.run(
+            ["git", "rev-parse", "--verify", "-q", "HEAD"], cwd=repo_path, capture_output=True, text=True
+        ).stdout.strip()
+        if parent:
+            git(["read-tree", parent], repo_path, env)
+        blob = git(["hash-object", "-w", "--stdin"], repo_path, input=os.urandom(file_size))
+        git(["update-index", "--add", "--cacheinfo", f"100644,{blob},{label}.bin"], repo_path, env)
+        tree = git(["write-tree"], repo_path, env)
+        commit_args = ["commit-tree", tree, "-m", label] + (["-p", parent] if parent else [])
+        commit = git(commit_args, repo_path)
+        git(["update-ref", "refs/heads/main", commit], repo_path)
+    finally:
+        if os.path.exists(index_file):
+            os.remove(index_file)
+
+
+class FakeGitHub:
+    """
+    Estado do servidor falso: lista de repositórios e contadores de chamadas.
+    """
+
+    def __init__(self, owner, per_page, rate_limit):
+        self.owner = owner
+        self.per_page = per_page
+        self.rate_limit = rate_limit
+        self.repos = []
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+            self.remaining = self.rate_limit
+
+    def page(self, number):
+        start = (number - 1) * self.per_page
+        return self.repos[start:start + self.per_page]
+
+    def last_page(self):
+        return max((len(self.repos) + self.per_page - 1) // self.per_page, 1)
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """
+    Responde a '/user/repos' como a API REST do GitHub e a '/graphql' como a consulta
+    de repositórios de script.get_graphql_repos().
+    """
+    api = None
+
+    def do_GET(self):
+        api = self.api
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path != "/user/repos":
+            self.send_error(404)
+            return
+
+        query = urllib.parse.parse_qs(parsed.query)
+        number = int(query.get("page", ["1"])[0])
+        body = json.dumps(api.page(number)).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+
+        with api.lock:
+            api.calls += 1
+            not_modified = self.headers.get("If-None-Match") == etag
+            if not_modified:
+                api.not_modified += 1
+            else:
+                # Como no GitHub, respostas 304 não consomem a cota.
+                api.remaining = max(api.remaining - 1, 0)
+                api.bytes_sent += len(body)
+            remaining = api.remaining
+
+        base = f"http://{self.headers['Host']}/user/repos?per_page={api.per_page}"
+        links = []
+        if number < api.last_page():
+            links.append(f'<{base}&page={number + 1}>; rel="next"')
+            links.append(f'<{base}&page={api.last_page()}>; rel="last"')
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("X-RateLimit-Limit", str(api.rate_limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        if links:
+            self.send_header("Link", ", ".join(links))
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        api = self.api
+        if urllib.parse.urlparse(self.path).path != "/graphql":
+            self.send_error(404)
+            return
+
+        variables = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["variables"]
+        start = int(variables["cursor"] or 0)
+        repos = api.repos[start:start + api.per_page]
+        end = start + len(repos)
+        body = json.dumps({"data": {"viewer": {"repositories": {
+            "pageInfo": {"hasNextPage": end < len(api.repos), "endCursor": str(end)},
+            "nodes": [
+                {
+                    "databaseId": repo["id"],
+                    "name": repo["name"],
+                    "sshUrl": repo["ssh_url"],
+                    "pushedAt": repo["pushed_at"],
+                    "owner": {"__typename": repo["owner"]["type"], "login": repo["owner"]["login"]},
+                    "isFork": repo["fork"],
+                    "parent": None,
+                }
+                for repo in repos
+            ],
+        }}}}).encode()
+
+        with api.lock:
+            api.calls += 1
+            api.remaining = max(api.remaining - 1, 0)
+            api.bytes_sent += len(body)
+            remaining = api.remaining
+
+        self.send_response(200)
+        self.send_header("X-RateLimit-Limit", str(api.rate_limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def generate_repos(api, source_dir, count, commits, file_size):
+    """
+    Gera um repositório semente e 'count' cópias bare dele, registradas no servidor falso.
+    """
+    seed = os.path.join(source_dir, "seed.git")
+    git(["init", "--bare", "--quiet", "--initial-branch=main", seed], source_dir)
+    for i in range(commits):
+        add_commit(seed, file_size, f"commit-{i}")
+
+    for i in range(count):
+        name = f"repo-{i:05d}"
+        path = os.path.join(source_dir, f"{name}.git")
+        git(["clone", "--bare", "--quiet", seed, path], source_dir)
+        api.repos.append({
+            "id": i + 1,
+            "name": name,
+            "full_name": f"{api.owner}/{name}",
+            "owner": {"login": api.owner, "type": "User"},
+            "ssh_url": f"file://{path}",
+            "pushed_at": "2000-01-01T00:00:00Z",
+            "fork": False,
+        })
+
+
+def apply_changes(api, source_dir, change_rate, file_size, round_number):
+    """
+    Adiciona um commit a uma fração dos repositórios e atualiza o 'pushed_at'.
+    """
+    changed = int(len(api.repos) * change_rate)
+    if not changed:
+        return 0
+    # Distribui as alterações ao longo de todas as páginas da listagem.
+    for repo in api.repos[::max(len(api.repos) // changed, 1)][:changed]:
+        path = os.path.join(source_dir, f"{repo['name']}.git")
+        add_commit(path, file_size, f"round-{round_number}")
+        repo["pushed_at"] = f"2000-01-{round_number:02d}T00:00:00Z"
+    return changed
+
+
+def run_round(api, server_url, backup_dir, metrics_path, script_args):
+    """
+    Executa o main() de script.py uma vez e retorna o resumo da rodada.
+    """
+    api.reset_counters()
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)
+
+    argv = sys.argv
+    sys.argv = [
+        "script.py", api.owner, backup_dir, "benchmark-token",
+        "--api-url", server_url, "--metrics", metrics_path, *script_args
+    ]
+    start = time.monotonic()
+    try:
+        script.main()
+    finally:
+        sys.argv = argv
+    elapsed = time.monotonic() - start
+
+    summary = {}
+    with open(metrics_path, "r") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("type") == "summary":
+                summary = record
+
+    return {
+        "elapsed": elapsed,
+        "repos_per_sec": len(api.repos) / elapsed if elapsed else 0.0,
+        "processed": summary.get("processed", 0),
+        "skipped": summary.get("skipped", 0),
+        "failed": summary.get("failed", 0),
+        "api_calls": api.calls,
+        "api_not_modified": api.not_modified,
+        "api_bytes": api.bytes_sent,
+        "git_bytes": summary.get("bytes_received", 0),
+        "p95": summary.get("p95", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark do backup contra uma API e repositórios Git locais",
+        epilog="Argumentos após '--' são repassados para script.py (ex.: -- --jobs 8 --mirror)."
+    )
+    parser.add_argument("--repos", type=int, default=100, help="Quantidade de repositórios (padrão: 100)")
+    parser.add_argument("--commits", type=int, default=5, help="Commits por repositório (padrão: 5)")
+    parser.add_argument("--file-size", type=int, default=16 * 1024,
+                        help="Tamanho em bytes do arquivo de cada commit (padrão: 16384)")
+    parser.add_argument("--change-rate", type=float, default=0.1,
+                        help="Fração dos repositórios alterada entre rodadas (padrão: 0.1)")
+    parser.add_argument("--rounds", type=int, default=2, help="Quantidade de rodadas (padrão: 2)")
+    parser.add_argument("--per-page", type=int, default=100, help="Repositórios por página da API (padrão: 100)")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Cota informada pela API falsa (padrão: 5000)")
+    parser.add_argument("--keep", action="store_true", help="Mantém o diretório temporário ao final")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON")
+    args, script_args = parser.parse_known_args()
+    script_args = [arg for arg in script_args if arg != "--"]
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix="backup-benchmark-")
+    source_dir = os.path.join(work_dir, "source")
+    backup_dir = os.path.join(work_dir, "backup")
+    metrics_path = os.path.join(work_dir, "metrics.jsonl")
+    os.makedirs(source_dir)
+
+    api = FakeGitHub("benchmark", args.per_page, args.rate_limit)
+    FakeGitHubHandler.api = api
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHubHandler)
+    server_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        start = time.monotonic()
+        generate_repos(api, source_dir, args.repos, args.commits, args.file_size)
+        print(f"{args.repos} repositórios gerados em {time.monotonic() - start:.1f}s ({work_dir})")
+
+        results = []
+        for round_number in range(1, args.rounds + 1):
+            changed = 0
+            if round_number > 1:
+                changed = apply_changes(api, source_dir, args.change_rate, args.file_size, round_number)
+            result = run_round(api, server_url, backup_dir, metrics_path, script_args)
+            result.update({"round": round_number, "changed": changed})
+            results.append(result)
+
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print(f"{'rodada':>6} {'alterados':>9} {'tempo(s)':>9} {'repos/s':>9} {'clonados':>8} "
+                  f"{'ignorados':>9} {'erros':>5} {'api':>5} {'304':>5} {'api bytes':>10} {'git bytes':>12} {'p95(s)':>7}")
+            for r in results:
+                print(f"{r['round']:>6} {r['changed']:>9} {r['elapsed']:>9.2f} {r['repos_per_sec']:>9.1f} "
+                      f"{r['processed']:>8} {r['skipped']:>9} {r['failed']:>5} {r['api_calls']:>5} "
+                      f"{r['api_not_modified']:>5} {r['api_bytes']:>10} {r['git_bytes']:>12} {r['p95']:>7.2f}")
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
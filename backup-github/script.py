@@ -5,34 +5,350 @@ import errno
 import argparse
 import subprocess
 import urllib.parse
+import json
 import time
+import hashlib
+import shutil
+import math
+import random
 import logging
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def get_json(url, token, session):
+class HttpCache:
+    """
+    Cache HTTP persistente para as páginas da API do GitHub, indexado pela URL.
+
+    Cada entrada guarda o ETag/Last-Modified, o corpo JSON e os links da próxima e
+    da última página.
+    As requisições seguintes enviam 'If-None-Match'/'If-Modified-Since' e, em caso de
+    resposta 304, a página é reproduzida a partir do cache; o GitHub não contabiliza
+    respostas 304 no rate limit.
+    """
+
+    def __init__(self, cache_dir, token):
+        self.cache_dir = cache_dir
+        # Apenas uma impressão digital do token é persistida, para invalidar
+        # entradas geradas com outra credencial sem gravar o token em disco.
+        self.token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
+        mkdir(cache_dir)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("url") != url or entry.get("token_id") != self.token_id:
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response, body, next_url, last_url=None):
+        if not response.headers.get("ETag") and not response.headers.get("Last-Modified"):
+            return
+        entry = {
+            "url": url,
+            "token_id": self.token_id,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "next": next_url,
+            "last": last_url,
+            "body": body,
+        }
+        path = self._path(url)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+class RateLimiter:
+    """
+    Controla o ritmo das chamadas à API do GitHub de forma proativa.
+
+    Um token bucket é recalibrado a cada resposta a partir de 'X-RateLimit-Remaining'
+    e 'X-RateLimit-Reset', distribuindo as requisições restantes ao longo da janela
+    em vez de esgotá-las e aguardar o reset. 'Retry-After' e o esgotamento da cota
+    bloqueiam todas as threads até o horário indicado.
+
+    Uma única instância deve ser compartilhada por todas as chamadas do script.
+    """
+    BURST = 10
+    MAX_RETRIES = 6
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tokens = float(self.BURST)
+        self.rate = None
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def acquire(self):
+        """
+        Aguarda até que uma requisição possa ser enviada e consome um token.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if self.rate is not None:
+                    self.tokens = min(self.BURST, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif not self.rate or self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update(self, response):
+        """
+        Recalibra o token bucket a partir dos cabeçalhos de rate limit da resposta.
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        retry_after = response.headers.get("Retry-After")
+
+        with self.lock:
+            now = time.monotonic()
+            if remaining is not None and reset is not None:
+                window = max(int(reset) - time.time(), 1)
+                remaining = int(remaining)
+                self.rate = remaining / window
+                self.tokens = min(self.tokens, float(remaining))
+                if remaining == 0:
+                    self.block(now + window + 1)
+            if retry_after is not None and retry_after.isdigit():
+                self.block(now + int(retry_after))
+
+    def block(self, until):
+        if until > self.blocked_until:
+            self.blocked_until = until
+            logging.warning(
+                f"Limite de requisições atingido. Aguardando {until - time.monotonic():.0f} segundos..."
+            )
+
+    def backoff(self, attempt):
+        """
+        Aguarda um intervalo exponencial com jitter completo antes de uma nova tentativa.
+        """
+        delay = random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+        logging.warning(f"Nova tentativa em {delay:.1f} segundos (tentativa {attempt + 1})...")
+        time.sleep(delay)
+
+
+def is_rate_limited(response):
+    """
+    Indica se a resposta é um bloqueio por rate limit primário ou secundário.
+    """
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    if response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers:
+        return True
+    try:
+        message = response.json().get("message", "")
+    except ValueError:
+        return False
+    return "rate limit" in message.lower()
+
+
+def api_request(session, method, url, headers, limiter, **kwargs):
+    """
+    Executa uma requisição à API do GitHub passando pelo RateLimiter compartilhado.
+
+    Bloqueios por rate limit (403/429) e erros 5xx são repetidos com backoff
+    exponencial com jitter, até RateLimiter.MAX_RETRIES tentativas.
+    """
+    for attempt in range(limiter.MAX_RETRIES + 1):
+        limiter.acquire()
+        response = session.request(method, url, headers=headers, **kwargs)
+        limiter.update(response)
+
+        retryable = is_rate_limited(response) or response.status_code >= 500
+        if not retryable or attempt == limiter.MAX_RETRIES:
+            return response
+
+        # Bloqueios com horário conhecido já foram registrados no limiter;
+        # os demais (secundários sem Retry-After, 5xx) recebem backoff.
+        if limiter.blocked_until <= time.monotonic():
+            limiter.backoff(attempt)
+    return response
+
+
+def fetch_page(url, headers, session, cache=None, limiter=None):
+    """
+    Busca uma única página da API do GitHub, usando o cache HTTP quando disponível.
+
+    Retorna uma tupla (corpo JSON, URL da próxima página, URL da última página).
+    """
+    limiter = limiter or RateLimiter()
+    entry = cache.get(url) if cache else None
+    response = api_request(
+        session, "GET", url, {**headers, **(cache.conditional_headers(entry) if cache else {})}, limiter
+    )
+    if response.status_code == 304 and entry is not None:
+        logging.debug(f"Página não modificada, usando cache: {url}")
+        return entry["body"], entry["next"], entry.get("last")
+
+    response.raise_for_status()
+    body = response.json()
+    links = response.links
+    next_url = links["next"]["url"] if "next" in links else None
+    last_url = links["last"]["url"] if "last" in links else None
+    if cache:
+        cache.store(url, response, body, next_url, last_url)
+    return body, next_url, last_url
+
+
+def page_urls(last_url):
+    """
+    Gera as URLs das páginas 2..N a partir do link 'last' da primeira resposta.
+    """
+    parsed = urllib.parse.urlparse(last_url)
+    query = urllib.parse.parse_qs(parsed.query)
+    last_page = int(query.get("page", ["1"])[0])
+    for page in range(2, last_page + 1):
+        query["page"] = [str(page)]
+        yield parsed._replace(query=urllib.parse.urlencode(query, doseq=True)).geturl()
+
+
+def get_json(url, token, session, cache=None, limiter=None, workers=1):
     """
     Gera páginas em JSON a partir da API do GitHub,
     tratando o rate limit.
+
+    Se um HttpCache for informado, as requisições são condicionais e respostas
+    304 reproduzem a página armazenada.
+
+    Com 'workers' > 1, o link 'last' da primeira resposta é usado para buscar
+    as páginas 2..N em paralelo; as páginas continuam sendo geradas em ordem.
     """
     headers = {"Authorization": f"token {token}"}
+    limiter = limiter or RateLimiter()
 
-    while url:
-        response = session.get(url, headers=headers)
-        if response.status_code == 403:
-            if response.headers.get("X-RateLimit-Remaining") == "0":
-                reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-                sleep_time = max(reset_time - int(time.time()), 0) + 5
-                logging.warning(f"Limite de requisições atingido. Aguardando {sleep_time} segundos...")
-                time.sleep(sleep_time)
-                continue
+    body, next_url, last_url = fetch_page(url, headers, session, cache, limiter)
+    yield body
+
+    if workers > 1 and next_url and last_url:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(fetch_page, page_url, headers, session, cache, limiter)
+                for page_url in page_urls(last_url)
+            ]
+            for future in futures:
+                yield future.result()[0]
+        return
+
+    while next_url:
+        body, next_url, _ = fetch_page(next_url, headers, session, cache, limiter)
+        yield body
+
+API_URL = "https://api.github.com"
+
+
+def graphql_url(api_url):
+    """
+    Deriva o endpoint GraphQL da URL base da API REST: no GitHub Enterprise a API REST
+    fica em '<host>/api/v3' e a GraphQL em '<host>/api/graphql'; no github.com, e em
+    servidores que seguem o mesmo formato, em '<api_url>/graphql'.
+    """
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v3"):
+        return api_url[:-len("/v3")] + "/graphql"
+    return f"{api_url}/graphql"
+
+
+GRAPHQL_REPOS_QUERY = """
+query($cursor: String, $affiliations: [RepositoryAffiliation]) {
+  viewer {
+    repositories(first: 100, after: $cursor, ownerAffiliations: $affiliations) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        sshUrl
+        pushedAt
+        owner { __typename login }
+        isFork
+        parent { nameWithOwner }
+      }
+    }
+  }
+}
+"""
+
+
+def get_graphql_repos(token, session, limiter=None, include_orgs=False, url=None):
+    """
+    Gera páginas de repositórios usando a API GraphQL do GitHub.
+
+    Solicita apenas os campos usados pelo backup e converte cada nó para o mesmo
+    formato do payload REST de '/user/repos' ('id', 'name', 'owner.login',
+    'ssh_url', 'pushed_at', 'fork', 'parent'), de modo que pode substituir get_json() em main().
+    Com 'include_orgs', os repositórios das organizações do usuário vêm na mesma consulta.
+    'url' é o endpoint GraphQL (padrão: o do github.com, ver graphql_url()).
+    """
+    url = url or graphql_url(API_URL)
+    headers = {"Authorization": f"bearer {token}"}
+    limiter = limiter or RateLimiter()
+    affiliations = ["OWNER", "ORGANIZATION_MEMBER"] if include_orgs else ["OWNER"]
+    cursor = None
+
+    while True:
+        payload = {
+            "query": GRAPHQL_REPOS_QUERY,
+            "variables": {"cursor": cursor, "affiliations": affiliations},
+        }
+        response = api_request(session, "POST", url, headers, limiter, json=payload)
         response.raise_for_status()
-        yield response.json()
-        links = response.links
-        url = links["next"]["url"] if "next" in links else None
+        data = response.json()
+        if data.get("errors"):
+            raise RuntimeError(f"Erro na consulta GraphQL: {data['errors']}")
+
+        repositories = data["data"]["viewer"]["repositories"]
+        yield [
+            {
+                "id": node["databaseId"],
+                "name": node["name"],
+                "owner": {"login": node["owner"]["login"], "type": node["owner"]["__typename"]},
+                "ssh_url": node["sshUrl"],
+                "pushed_at": node["pushedAt"],
+                "fork": node["isFork"],
+                "parent": {"full_name": node["parent"]["nameWithOwner"]} if node["parent"] else None,
+            }
+            for node in repositories["nodes"]
+        ]
+
+        page_info = repositories["pageInfo"]
+        if not page_info["hasNextPage"]:
+            return
+        cursor = page_info["endCursor"]
+
 
 def check_name(name):
     """
@@ -56,41 +372,682 @@ def mkdir(path):
         raise
 
 
-def clone(repo_name, ssh_url, to_path):
+def repo_dir_name(repo_name, mirror=False):
+    """
+    Nome do diretório local do repositório. Espelhos bare recebem o sufixo '.git',
+    seguindo a convenção do Git, para não colidirem com checkouts existentes.
+    """
+    return f"{repo_name}.git" if mirror else repo_name
+
+
+TRANSFER_RE = re.compile(
+    r"(?:Receiving|Unpacking) objects:\s+100% \((\d+)/\d+\)(?:, ([\d.]+) (bytes|KiB|MiB|GiB))?"
+)
+
+TOTAL_RE = re.compile(r"remote: Total (\d+)")
+
+TRANSFER_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+
+STDERR_LIMIT = 4000
+
+
+def new_stats():
+    """
+    Métricas de transferência acumuladas pelos comandos do Git de um repositório.
+    """
+    return {"operation": None, "bytes_received": 0, "objects": 0, "returncode": 0, "stderr": None}
+
+
+def objects_size(repo_path, since=0):
+    """
+    Tamanho em bytes dos arquivos do diretório de objetos de um repositório (checkout
+    ou bare) modificados a partir de 'since' (timestamp).
+    """
+    objects_dir = os.path.join(repo_path, ".git", "objects")
+    if not os.path.isdir(objects_dir):
+        objects_dir = os.path.join(repo_path, "objects")
+    total = 0
+    for root, _, files in os.walk(objects_dir):
+        for name in files:
+            try:
+                info = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if info.st_mtime >= since:
+                total += info.st_size
+    return total
+
+
+def run_git(args, cwd=None, stats=None):
+    """
+    Executa um comando do Git com o stderr capturado, sem exibi-lo no terminal.
+
+    Se 'stats' for informado, o progresso de 'Receiving/Unpacking objects' (emitido
+    com '--progress') é somado em 'bytes_received'/'objects'. Transferências pequenas
+    não exibem o volume recebido; nelas é contado o total de objetos do remoto e,
+    em comandos executados dentro do repositório ('cwd'), o tamanho dos objetos
+    gravados pelo comando. O diretório de objetos só é percorrido nesse caso.
+    Em caso de falha, o final do stderr é guardado em 'stats' e
+    subprocess.CalledProcessError é lançada.
+    """
+    started = time.time()
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace"
+    )
+    if stats is not None:
+        transfers = TRANSFER_RE.findall(result.stderr)
+        totals = TOTAL_RE.findall(result.stderr)
+        size = None
+        if transfers:
+            objects, size, unit = transfers[-1]
+            stats["objects"] += int(objects)
+            if size:
+                stats["bytes_received"] += int(float(size) * TRANSFER_UNITS[unit])
+        elif totals:
+            stats["objects"] += int(totals[-1])
+        if not size and (transfers or totals) and cwd:
+            stats["bytes_received"] += objects_size(cwd, since=started)
+        stats["returncode"] = result.returncode
+        if result.returncode != 0:
+            stats["stderr"] = result.stderr.strip()[-STDERR_LIMIT:]
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, stderr=result.stderr)
+    return result
+
+
+def clone(repo_name, ssh_url, to_path, mirror=False, strategy=None, reference=None, stats=None):
     """
     Clona o repositório via SSH ou, se já existir, realiza um 'git pull'
     para atualizar as alterações do repositório remoto.
+
+    No modo espelho ('mirror'), mantém um repositório bare com todas as refs
+    ('git clone --mirror') e o atualiza apenas com fetch e remoção de refs
+    apagadas no remoto ('git fetch --all --prune'), sem escrever checkouts.
+
+    'strategy' define como o primeiro clone é feito: {"filter": "blob:none" ou
+    "tree:0"} para clones parciais e {"depth": N} para clones rasos. As
+    atualizações seguintes herdam a configuração gravada pelo Git no repositório.
+
+    'reference' aponta para um repositório cujos objetos são reaproveitados via
+    alternates ('git clone --reference-if-able'), evitando baixá-los novamente.
     
-    As saídas dos comandos do Git são redirecionadas para evitar que sejam
-    exibidas no terminal, ficando disponíveis apenas nos logs do programa.
+    O primeiro clone é feito em '<repo>.partial' e renomeado ao final, de modo que
+    um clone interrompido nunca seja confundido com um repositório já existente.
+
+    As saídas dos comandos do Git são capturadas para evitar que sejam exibidas
+    no terminal; o volume transferido e o stderr de falhas ficam em 'stats'.
+
+    Retorna True em caso de sucesso e False se a atualização falhar. Uma falha
+    no clone inicial é propagada como subprocess.CalledProcessError.
     """
-    repo_path = os.path.join(to_path, repo_name)
+    repo_path = os.path.join(to_path, repo_dir_name(repo_name, mirror))
+    if stats is None:
+        stats = new_stats()
     if not os.path.exists(repo_path):
         logging.info(f"Iniciando clone do repositório: {ssh_url}")
+        stats["operation"] = "clone"
+        clone_args = ["--mirror"] if mirror else []
+        if strategy and strategy.get("filter"):
+            clone_args.append(f"--filter={strategy['filter']}")
+        if strategy and strategy.get("depth"):
+            # '--depth' implica '--single-branch'; o backup, espelho ou checkout, mantém todas as branches.
+            clone_args += ["--depth", str(strategy["depth"]), "--no-single-branch"]
+        if reference:
+            clone_args += ["--reference-if-able", reference]
+        partial_path = f"{repo_path}.partial"
+        if os.path.exists(partial_path):
+            logging.warning(f"Removendo clone incompleto de uma execução anterior: {partial_path}")
+            shutil.rmtree(partial_path)
         try:
-            subprocess.run(
-                ["git", "clone", ssh_url, repo_path],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            run_git(["clone", "--progress", *clone_args, ssh_url, partial_path], stats=stats)
+            os.rename(partial_path, repo_path)
             logging.info(f"Repositório '{repo_name}': SUCESSO")
+            return True
         except subprocess.CalledProcessError as e:
             logging.error(f"Repositório '{repo_name}': ERRO\n{e}")
+            shutil.rmtree(partial_path, ignore_errors=True)
             raise
     else:
         logging.info(f"Iniciando atualização do repositório: {repo_name}")
+        stats["operation"] = "fetch"
+        update_args = ["fetch", "--all", "--prune", "--progress"] if mirror else ["pull", "--progress"]
+        try:
+            run_git(update_args, cwd=repo_path, stats=stats)
+            logging.info(f"Repositório '{repo_name}': SUCESSO")
+            return True
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Repositório '{repo_name}': ERRO\n{e}")
+            return False
+
+
+def deepen(repo_name, repo_path, depth, stats=None):
+    """
+    Aprofunda o histórico de um clone raso em mais 'depth' commits
+    ('git fetch --deepen'). A cada execução o backup recupera uma parte do
+    histórico, até que o repositório deixe de ser raso.
+    """
+    logging.info(f"Aprofundando histórico do repositório: {repo_name}")
+    try:
+        run_git(["fetch", "--progress", f"--deepen={depth}"], cwd=repo_path, stats=stats)
+        return True
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Repositório '{repo_name}': ERRO ao aprofundar histórico\n{e}")
+        return False
+
+
+def is_shallow(repo_path):
+    """
+    Indica se o repositório local é um clone raso.
+    """
+    result = subprocess.run(
+        ["git", "rev-parse", "--is-shallow-repository"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True
+    )
+    return result.stdout.strip() == "true"
+
+
+def get_head(repo_path):
+    """
+    Retorna o commit apontado por HEAD no repositório local ou None se não for possível obtê-lo.
+    """
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+class Manifest:
+    """
+    Índice local dos repositórios sincronizados, salvo em '<backup_dir>/.manifest.json'.
+
+    Cada entrada é indexada pelo id do repositório no GitHub e guarda o nome completo,
+    o 'pushed_at' informado pela API, o HEAD local, a estratégia usada no primeiro
+    clone e o horário da última sincronização bem-sucedida. Repositórios cujo
+    'pushed_at' não mudou desde então não precisam de nenhuma chamada ao Git, exceto
+    clones rasos, que continuam sendo aprofundados até terem o histórico completo.
+    """
+    FILE_NAME = ".manifest.json"
+
+    def __init__(self, backup_dir):
+        self.path = os.path.join(backup_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Manifesto '{self.path}' inválido, ignorando: {e}")
+
+    def is_current(self, repo, repo_path):
+        """
+        Indica se o repositório já está sincronizado com o 'pushed_at' atual.
+        """
+        entry = self.entries.get(str(repo.get("id")))
+        return (
+            entry is not None
+            and not entry.get("shallow")
+            and repo.get("pushed_at") is not None
+            and entry.get("pushed_at") == repo.get("pushed_at")
+            and os.path.exists(repo_path)
+        )
+
+    def strategy_for(self, repo):
+        """
+        Retorna a estratégia de clone registrada para o repositório, se houver.
+        """
+        with self.lock:
+            entry = self.entries.get(str(repo.get("id")))
+        return entry.get("strategy") if entry else None
+
+    def record(self, repo, full_name, repo_path, strategy=None, network=None):
+        entry = {
+            "name": full_name,
+            "path": os.path.relpath(repo_path, os.path.dirname(self.path)),
+            "network": network,
+            "pushed_at": repo.get("pushed_at"),
+            "head": get_head(repo_path),
+            "strategy": strategy or {},
+            "shallow": is_shallow(repo_path),
+            "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with self.lock:
+            self.entries[str(repo.get("id"))] = entry
+
+    def save(self):
+        """
+        Grava o manifesto de forma atômica (arquivo temporário + rename).
+        """
+        with self.lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class Journal:
+    """
+    Diário da execução, salvo em '<backup_dir>/.journal.jsonl'.
+
+    Registra cada repositório planejado (com os dados necessários para refazê-lo),
+    cada repositório concluído e o fim da listagem. Se a execução for interrompida,
+    '--resume' continua os repositórios planejados e ainda não concluídos; se a
+    listagem não chegou ao fim, ela é refeita (barata com o cache de ETag) e os
+    repositórios já concluídos são ignorados. Ao final de uma execução completa,
+    o diário é renomeado para '.journal.jsonl.last'.
+    """
+    FILE_NAME = ".journal.jsonl"
+
+    def __init__(self, backup_dir):
+        self.path = os.path.join(backup_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.file = None
+
+    def unfinished(self):
+        """
+        Retorna, para uma execução interrompida, a tupla (pendentes, concluídos,
+        listado): os trabalhos planejados e não concluídos, na ordem em que foram
+        planejados, os nomes dos repositórios concluídos e se a listagem terminou.
+        Retorna None se não houver execução interrompida.
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        planned = {}
+        done = set()
+        listed = False
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A última linha pode ter sido truncada pela interrupção.
+                    continue
+                if record["event"] == "planned":
+                    planned[record["job"]["full_name"]] = record["job"]
+                elif record["event"] == "done":
+                    done.add(record["repo"])
+                elif record["event"] == "listed":
+                    listed = True
+                elif record["event"] == "finished":
+                    return None
+        return [job for name, job in planned.items() if name not in done], done, listed
+
+    def start(self, resume=False):
+        self.file = open(self.path, "a" if resume else "w")
+        self._write({"event": "resumed" if resume else "started"})
+
+    def plan(self, job):
+        self._write({"event": "planned", "job": job})
+
+    def done(self, full_name, ok):
+        self._write({"event": "done", "repo": full_name, "ok": ok})
+
+    def listed(self):
+        self._write({"event": "listed"})
+
+    def finish(self):
+        self._write({"event": "finished"})
+        self.close()
+        os.replace(self.path, self.path + ".last")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _write(self, record):
+        record["time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with self.lock:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+
+class ObjectStore:
+    """
+    Repositórios de objetos compartilhados entre forks, em '<backup_dir>/.objects'.
+
+    Cada rede de forks (identificada pelo repositório de origem, 'source'/'parent')
+    possui um repositório bare '<owner>/<repo>.git'. Os forks são ligados a ele via
+    alternates e publicam suas refs em 'refs/forks/<owner>/...', de modo que os objetos
+    comuns sejam armazenados e baixados uma única vez.
+
+    O repositório compartilhado nunca remove objetos inalcançáveis
+    ('gc.pruneExpire=never'), pois outros forks podem depender deles.
+    """
+    DIR_NAME = ".objects"
+
+    def __init__(self, backup_dir, token, session, cache=None, limiter=None, api_url=API_URL):
+        self.root = os.path.join(backup_dir, self.DIR_NAME)
+        self.api_url = api_url
+        self.headers = {"Authorization": f"token {token}"}
+        self.session = session
+        self.cache = cache
+        self.limiter = limiter or RateLimiter()
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def network_for(self, repo, full_name):
+        """
+        Retorna o nome completo do repositório de origem da rede de forks, ou None se
+        o repositório não faz parte de uma rede com repositório compartilhado.
+
+        O payload de '/user/repos' não traz 'source'/'parent'; para forks listados
+        via REST, os detalhes do repositório são consultados na API.
+        """
+        if not repo.get("fork"):
+            return full_name if os.path.exists(self.store_path(full_name)) else None
+
+        source = repo.get("source") or repo.get("parent")
+        if source is None:
+            url = f"{self.api_url}/repos/{full_name}"
+            try:
+                details, _, _ = fetch_page(url, self.headers, self.session, self.cache, self.limiter)
+            except Exception as e:
+                logging.warning(f"Não foi possível obter a origem do fork {full_name}: {e}")
+                return None
+            source = details.get("source") or details.get("parent")
+        if not source:
+            return None
+
+        owner, _, name = source["full_name"].partition("/")
         try:
+            return f"{check_name(owner)}/{check_name(name)}"
+        except RuntimeError as e:
+            logging.error(e)
+            return None
+
+    def store_path(self, network):
+        owner, name = network.split("/")
+        return os.path.join(self.root, owner, f"{name}.git")
+
+    def lock_for(self, network):
+        with self.locks_lock:
+            return self.locks.setdefault(network, threading.Lock())
+
+    def ensure(self, network):
+        """
+        Cria o repositório compartilhado da rede, se ainda não existir.
+        """
+        path = self.store_path(network)
+        with self.lock_for(network):
+            if not os.path.exists(path):
+                mkdir(os.path.dirname(path))
+                subprocess.run(["git", "init", "--bare", "--quiet", path], check=True)
+                subprocess.run(["git", "config", "gc.pruneExpire", "never"], cwd=path, check=True)
+                subprocess.run(["git", "config", "gc.reflogExpireUnreachable", "never"], cwd=path, check=True)
+                logging.info(f"Repositório de objetos compartilhado criado: {path}")
+        return path
+
+    def link(self, repo_path, network):
+        """
+        Adiciona o repositório compartilhado aos alternates de um repositório existente.
+        """
+        objects_dir = os.path.join(self.store_path(network), "objects")
+        git_dir = subprocess.run(
+            ["git", "rev-parse", "--absolute-git-dir"],
+            cwd=repo_path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        alternates = os.path.join(git_dir, "objects", "info", "alternates")
+
+        current = []
+        if os.path.exists(alternates):
+            with open(alternates, "r") as f:
+                current = f.read().splitlines()
+        if objects_dir not in current:
+            os.makedirs(os.path.dirname(alternates), exist_ok=True)
+            with open(alternates, "a") as f:
+                f.write(objects_dir + "\n")
+
+    def publish(self, repo_path, owner, network):
+        """
+        Copia as refs (e os objetos) do repositório para o repositório compartilhado,
+        em 'refs/forks/<owner>/'. Clones rasos ou parciais não são publicados, pois
+        não possuem todos os objetos das refs.
+        """
+        if is_shallow(repo_path) or subprocess.run(
+            ["git", "config", "--get", "remote.origin.partialclonefilter"],
+            cwd=repo_path, capture_output=True
+        ).returncode == 0:
+            logging.debug(f"Repositório {repo_path} é raso ou parcial; não será publicado em {network}")
+            return
+
+        with self.lock_for(network):
             subprocess.run(
-                ["git", "pull"],
-                cwd=repo_path,
+                ["git", "fetch", "--quiet", "--no-tags", repo_path,
+                 f"+refs/heads/*:refs/forks/{owner}/heads/*",
+                 f"+refs/tags/*:refs/forks/{owner}/tags/*"],
+                cwd=self.store_path(network),
                 check=True,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
-            logging.info(f"Repositório '{repo_name}': SUCESSO")
+
+    def maintenance(self, manifest):
+        """
+        Reempacota os repositórios de forma segura: primeiro publica as refs de cada
+        membro no repositório compartilhado, depois reempacota o compartilhado mantendo
+        objetos inalcançáveis e, por fim, reempacota cada membro com 'git repack -l',
+        que descarta os objetos já disponíveis via alternates.
+        """
+        backup_dir = os.path.dirname(manifest.path)
+        members = {}
+        for entry in manifest.entries.values():
+            if entry.get("network") and entry.get("path"):
+                members.setdefault(entry["network"], []).append(entry)
+
+        for network, entries in sorted(members.items()):
+            store = self.store_path(network)
+            if not os.path.exists(store):
+                continue
+            logging.info(f"Manutenção da rede de forks {network} ({len(entries)} repositórios)")
+            try:
+                paths = []
+                for entry in entries:
+                    repo_path = os.path.join(backup_dir, entry["path"])
+                    if os.path.exists(repo_path):
+                        self.publish(repo_path, entry["name"].split("/")[0], network)
+                        paths.append(repo_path)
+
+                subprocess.run(["git", "repack", "-a", "-d", "--keep-unreachable", "--quiet"], cwd=store, check=True)
+                for repo_path in paths:
+                    subprocess.run(["git", "repack", "-a", "-d", "-l", "--quiet"], cwd=repo_path, check=True)
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Erro na manutenção da rede {network}: {e}")
+
+
+JOURNAL_REPO_FIELDS = ("id", "name", "owner", "ssh_url", "pushed_at", "fork", "parent", "source")
+
+MANIFEST_SAVE_EVERY = 50
+
+
+def sync_repo(repo, full_name, ssh_url, owner_path, repo_name, manifest, mirror, strategy, object_store, stats):
+    """
+    Clona ou atualiza um repositório, acumulando as métricas em 'stats', e o registra
+    no manifesto em caso de sucesso. Retorna True se o backup foi concluído.
+
+    Repositórios já existentes mantêm a estratégia registrada no manifesto, e não a
+    informada na linha de comando; clones rasos são aprofundados a cada atualização.
+
+    Com um ObjectStore, forks são clonados reaproveitando os objetos da sua rede e,
+    após o backup, publicam suas refs no repositório compartilhado.
+    """
+    repo_path = os.path.join(owner_path, repo_dir_name(repo_name, mirror))
+    exists = os.path.exists(repo_path)
+    if exists:
+        strategy = manifest.strategy_for(repo) or {}
+
+    network = None
+    reference = None
+    if object_store:
+        network = object_store.network_for(repo, full_name)
+    if network:
+        try:
+            reference = object_store.ensure(network)
+            if exists:
+                object_store.link(repo_path, network)
         except subprocess.CalledProcessError as e:
-            logging.error(f"Repositório '{repo_name}': ERRO\n{e}")
+            logging.error(f"Erro ao preparar objetos compartilhados de {full_name}: {e}")
+            network = reference = None
+
+    try:
+        ok = clone(repo_name, ssh_url, owner_path, mirror, strategy, reference, stats)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Erro ao atualizar {full_name}: {e}")
+        ok = False
+
+    if ok and exists and strategy and strategy.get("depth") and is_shallow(repo_path):
+        ok = deepen(repo_name, repo_path, strategy["depth"], stats)
+
+    if ok and network:
+        try:
+            object_store.publish(repo_path, full_name.split("/")[0], network)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Erro ao publicar objetos de {full_name} em {network}: {e}")
+
+    if ok:
+        manifest.record(repo, full_name, repo_path, strategy, network)
+    return ok
+
+
+def backup_repo(repo, full_name, ssh_url, owner_path, repo_name, manifest, mirror=False, strategy=None,
+                object_store=None):
+    """
+    Executa o backup de um único repositório dentro de uma thread do pool,
+    convertendo qualquer exceção em um registro de métricas ('repo', 'ok', operação,
+    tempo, bytes e objetos recebidos, stderr em caso de falha), de modo que um
+    repositório com problema não interrompa o relatório da execução.
+    """
+    start = time.monotonic()
+    stats = new_stats()
+    try:
+        ok = sync_repo(
+            repo, full_name, ssh_url, owner_path, repo_name, manifest, mirror, strategy, object_store, stats
+        )
+    except Exception as e:
+        logging.error(f"Erro inesperado ao processar {full_name}: {e}")
+        stats["stderr"] = str(e)[-STDERR_LIMIT:]
+        ok = False
+
+    return {
+        "type": "repo",
+        "repo": full_name,
+        "ok": ok,
+        "wall_time": round(time.monotonic() - start, 3),
+        **stats,
+    }
+
+
+def percentile(values, fraction):
+    """
+    Percentil pelo método do posto mais próximo; 'values' deve estar ordenado.
+    """
+    if not values:
+        return 0.0
+    index = min(max(math.ceil(fraction * len(values)) - 1, 0), len(values) - 1)
+    return values[index]
+
+
+class RunReport:
+    """
+    Métricas estruturadas da execução.
+
+    Cada repositório gera um registro que, se 'path' for informado, é gravado
+    imediatamente como uma linha JSON; ao final são gravados o tempo da listagem e
+    um resumo com p50/p95/máximo e os repositórios mais lentos.
+    """
+    SLOWEST = 10
+
+    def __init__(self, path=None):
+        self.lock = threading.Lock()
+        self.records = []
+        self.listing_time = 0.0
+        self.pages = 0
+        self.file = open(path, "a") if path else None
+
+    def write(self, record):
+        with self.lock:
+            if record.get("type") == "repo":
+                self.records.append(record)
+            if self.file:
+                self.file.write(json.dumps(record) + "\n")
+                self.file.flush()
+
+    def timed_pages(self, pages):
+        """
+        Repassa as páginas da listagem medindo apenas o tempo gasto em obtê-las.
+        """
+        iterator = iter(pages)
+        while True:
+            start = time.monotonic()
+            try:
+                page = next(iterator)
+            except StopIteration:
+                self.listing_time += time.monotonic() - start
+                return
+            self.listing_time += time.monotonic() - start
+            self.pages += 1
+            yield page
+
+    def summarize(self, skipped, elapsed):
+        """
+        Exibe o resumo da execução: total de repositórios processados, sucessos,
+        falhas, repositórios ignorados por estarem atualizados, tempos p50/p95/máximo
+        e os repositórios mais lentos.
+        """
+        failures = sorted(r["repo"] for r in self.records if not r["ok"])
+        times = sorted(r["wall_time"] for r in self.records)
+        slowest = sorted(self.records, key=lambda r: r["wall_time"], reverse=True)[:self.SLOWEST]
+        summary = {
+            "type": "summary",
+            "processed": len(self.records),
+            "succeeded": len(self.records) - len(failures),
+            "failed": len(failures),
+            "skipped": skipped,
+            "pages": self.pages,
+            "listing_time": round(self.listing_time, 3),
+            "elapsed": round(elapsed, 3),
+            "bytes_received": sum(r["bytes_received"] for r in self.records),
+            "objects": sum(r["objects"] for r in self.records),
+            "p50": percentile(times, 0.5),
+            "p95": percentile(times, 0.95),
+            "max": times[-1] if times else 0.0,
+            "slowest": [{"repo": r["repo"], "wall_time": r["wall_time"]} for r in slowest],
+        }
+        self.write(summary)
+
+        logging.info(
+            f"Resumo: {summary['processed']} repositórios processados, "
+            f"{summary['succeeded']} com sucesso, {summary['failed']} com erro, "
+            f"{skipped} sem alterações em {elapsed:.1f} segundos"
+        )
+        logging.info(
+            f"Listagem: {self.pages} páginas em {self.listing_time:.1f} segundos; "
+            f"recebidos {summary['bytes_received']} bytes em {summary['objects']} objetos"
+        )
+        logging.info(
+            f"Tempo por repositório: p50 {summary['p50']:.1f}s, p95 {summary['p95']:.1f}s, "
+            f"máximo {summary['max']:.1f}s"
+        )
+        for record in slowest:
+            logging.info(f"  {record['wall_time']:.1f}s {record['repo']} ({record['operation']})")
+        for name in failures:
+            logging.error(f"Falha no backup: {name}")
+
+    def close(self):
+        if self.file:
+            self.file.close()
 
 
 def main():
@@ -98,8 +1055,46 @@ def main():
     parser.add_argument("username", metavar="USERNAME", help="Seu usuário do GitHub")
     parser.add_argument("directory", metavar="DIRECTORY", help="Diretório para salvar o backup")
     parser.add_argument("token", metavar="TOKEN", help="Seu token de acesso pessoal")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Número de repositórios clonados/atualizados em paralelo (padrão: 1)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignora o manifesto e sincroniza todos os repositórios")
+    parser.add_argument("--mirror", action="store_true",
+                        help="Armazena espelhos bare (git clone --mirror) em vez de checkouts")
+    parser.add_argument("--list-jobs", type=int, default=4,
+                        help="Número de páginas da listagem buscadas em paralelo (padrão: 4)")
+    parser.add_argument("--filter", choices=["blob:none", "tree:0"],
+                        help="Clone parcial no primeiro backup: sem blobs (blob:none) ou sem árvores (tree:0)")
+    parser.add_argument("--depth", type=int,
+                        help="Clone raso no primeiro backup; o histórico é aprofundado nas execuções seguintes")
+    parser.add_argument("--backend", choices=["rest", "graphql"], default="rest",
+                        help="API usada na listagem de repositórios (padrão: rest)")
+    parser.add_argument("--include-orgs", action="store_true",
+                        help="Inclui os repositórios das organizações das quais o usuário é membro")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Compartilha objetos entre forks da mesma rede via git alternates")
+    parser.add_argument("--maintenance", action="store_true",
+                        help="Apenas reempacota os repositórios compartilhados entre forks e encerra")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Grava métricas por repositório e o resumo da execução em JSON lines")
+    parser.add_argument("--api-url", default=API_URL,
+                        help=f"URL base da API REST; no GitHub Enterprise, '<host>/api/v3' (padrão: {API_URL})")
+    parser.add_argument("--graphql-url",
+                        help="Endpoint da API GraphQL usado com '--backend graphql' "
+                             "(padrão: derivado de --api-url, por exemplo '<host>/api/graphql')")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua apenas os repositórios pendentes de uma execução interrompida")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Desativa o cache HTTP (ETag) da listagem de repositórios")
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error("--jobs deve ser maior ou igual a 1")
+    if args.list_jobs < 1:
+        parser.error("--list-jobs deve ser maior ou igual a 1")
+    if args.depth is not None and args.depth < 1:
+        parser.error("--depth deve ser maior ou igual a 1")
+
     username = args.username
     token = args.token
     backup_dir = os.path.expanduser(args.directory)
@@ -108,30 +1103,143 @@ def main():
         logging.info(f"Diretório criado: {backup_dir}")
 
     session = requests.Session()
-    base_url = "https://api.github.com/user/repos?per_page=100"
-    for page in get_json(base_url, token, session):
-        for repo in page:
-            try:
-                name = check_name(repo["name"])
-                owner = check_name(repo["owner"]["login"])
-            except RuntimeError as e:
-                logging.error(e)
-                continue
+    # Mantém uma conexão reaproveitável por thread da listagem paralela.
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.list_jobs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    cache = None if args.no_cache else HttpCache(os.path.join(backup_dir, ".http-cache"), token)
+    limiter = RateLimiter()
+    api_url = args.api_url.rstrip("/")
+    object_store = (
+        ObjectStore(backup_dir, token, session, cache, limiter, api_url) if args.dedup or args.maintenance else None
+    )
+    base_url = f"{api_url}/user/repos?per_page=100"
+    graphql_endpoint = args.graphql_url or graphql_url(api_url)
+    start = time.monotonic()
+    skipped = 0
+    manifest = Manifest(backup_dir)
+    if args.maintenance:
+        object_store.maintenance(manifest)
+        return
 
-            if username and owner.lower() != username.lower():
-                continue
+    strategy = {key: value for key, value in (("filter", args.filter), ("depth", args.depth)) if value}
+
+    report = RunReport(os.path.expanduser(args.metrics) if args.metrics else None)
+    journal = Journal(backup_dir)
+    resumed = journal.unfinished()
+    if args.resume and resumed is None:
+        logging.info("Nenhuma execução interrompida encontrada; iniciando uma nova execução")
+    elif resumed is not None and not args.resume:
+        logging.warning("A execução anterior foi interrompida; use --resume para continuá-la")
+    if not args.resume:
+        resumed = None
+
+    def listed_jobs():
+        """
+        Gera os trabalhos de backup a partir da listagem da API, ignorando os
+        repositórios inválidos, de outros donos ou sem alterações.
+        """
+        nonlocal skipped
+        if args.backend == "graphql":
+            pages = get_graphql_repos(token, session, limiter, args.include_orgs, graphql_endpoint)
+        else:
+            pages = get_json(base_url, token, session, cache, limiter, args.list_jobs)
+
+        for page in report.timed_pages(pages):
+            for repo in page:
+                try:
+                    name = check_name(repo["name"])
+                    owner = check_name(repo["owner"]["login"])
+                except RuntimeError as e:
+                    logging.error(e)
+                    continue
+
+                is_org = args.include_orgs and repo["owner"].get("type") == "Organization"
+                if username and owner.lower() != username.lower() and not is_org:
+                    continue
 
-            owner_path = os.path.join(backup_dir, owner)
-            mkdir(owner_path)
-            try:
                 ssh_url = repo.get("ssh_url")
                 if not ssh_url:
                     logging.error(f"Repositório {owner}/{name} não possui URL SSH")
                     continue
 
-                clone(name, ssh_url, owner_path)
-            except subprocess.CalledProcessError as e:
-                logging.error(f"Erro ao atualizar {owner}/{name}: {e}")
+                owner_path = os.path.join(backup_dir, owner)
+                repo_path = os.path.join(owner_path, repo_dir_name(name, args.mirror))
+                if not args.full and manifest.is_current(repo, repo_path):
+                    logging.debug(f"Repositório {owner}/{name} sem alterações desde a última sincronização")
+                    skipped += 1
+                    continue
+
+                yield {
+                    "repo": {key: repo.get(key) for key in JOURNAL_REPO_FIELDS if key in repo},
+                    "full_name": f"{owner}/{name}",
+                    "ssh_url": ssh_url,
+                    "owner_path": owner_path,
+                    "name": name,
+                }
+
+    def planned_jobs(pending, seen):
+        """
+        Gera os trabalhos pendentes e, em seguida, os da listagem que não estão em
+        'seen', registrando-os no diário. Ao fim da listagem, registra 'listed'.
+        """
+        yield from pending
+        for job in listed_jobs():
+            if job["full_name"] in seen:
+                continue
+            journal.plan(job)
+            yield job
+        journal.listed()
+
+    # O semáforo limita quantos repositórios aguardam na fila do pool, de modo que
+    # a listagem das próximas páginas avance junto com os clones já em andamento.
+    pending = threading.BoundedSemaphore(args.jobs * 2)
+    futures = []
+    # on_done é executado nas threads do pool; next() em itertools.count é atômico.
+    completed = itertools.count(1)
+
+    def on_done(future):
+        pending.release()
+        record = future.result()
+        report.write(record)
+        journal.done(record["repo"], record["ok"])
+        if next(completed) % MANIFEST_SAVE_EVERY == 0:
+            manifest.save()
+
+    journal.start(resume=resumed is not None)
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            if resumed is None:
+                jobs = planned_jobs([], set())
+            else:
+                pending_jobs, done, listed = resumed
+                logging.info(f"Retomando execução interrompida: {len(pending_jobs)} repositórios pendentes")
+                if listed:
+                    jobs = pending_jobs
+                else:
+                    logging.info("A listagem não havia terminado; listando os repositórios novamente")
+                    jobs = planned_jobs(pending_jobs, done | {job["full_name"] for job in pending_jobs})
+
+            for job in jobs:
+                mkdir(job["owner_path"])
+
+                pending.acquire()
+                future = executor.submit(
+                    backup_repo, job["repo"], job["full_name"], job["ssh_url"], job["owner_path"],
+                    job["name"], manifest, args.mirror, strategy, object_store if args.dedup else None
+                )
+                future.add_done_callback(on_done)
+                futures.append(future)
+
+        # Os registros já foram gravados em on_done; aqui apenas propagam-se erros inesperados.
+        for future in futures:
+            future.result()
+        report.summarize(skipped, time.monotonic() - start)
+        journal.finish()
+    finally:
+        manifest.save()
+        journal.close()
+        report.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+"""
+Exportação e restauração de snapshots do diretório de backup.
+
+'export' gera um 'git bundle' por repositório registrado no manifesto do backup,
+incremental em relação às refs do snapshot anterior, e os grava em um arquivo
+.tar.gz junto com um manifesto de checksums (SNAPSHOT.json). Os bundles são
+gerados em paralelo por um pool de processos.
+
+'restore' confere os checksums do snapshot, aplica os bundles em repositórios
+bare no diretório de destino e ajusta as refs de cada um às do snapshot.
+Snapshots incrementais devem ser restaurados em ordem, a partir do último
+snapshot completo.
+
+Repositórios cujo bundle não pode ser gerado (por exemplo, clones parciais com
+objetos ausentes) são registrados no log e ficam fora do snapshot; o próximo
+snapshot os tenta novamente a partir das refs do último snapshot em que entraram.
+
+Exemplos:
+    python snapshot.py export ~/backup ~/snapshots
+    python snapshot.py restore ~/snapshots/snapshot-20250101T000000.000000Z.tar.gz ~/restore
+    python snapshot.py restore --verify-only ~/snapshots/snapshot-20250101T000000.000000Z.tar.gz
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tarfile
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+from script import Manifest, mkdir
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STATE_FILE = os.path.join(".snapshots", "state.json")
+
+MANIFEST_NAME = "SNAPSHOT.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_refs(repo_path):
+    """
+    Retorna as refs do repositório como um dicionário {ref: commit}.
+    """
+    result = subprocess.run(
+        ["git", "for-each-ref", "--format=%(objectname) %(refname)"],
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    refs = {}
+    for line in result.stdout.splitlines():
+        sha, ref = line.split(" ", 1)
+        refs[ref] = sha
+    return refs
+
+
+def has_object(repo_path, sha):
+    return subprocess.run(
+        ["git", "cat-file", "-e", sha], cwd=repo_path, capture_output=True
+    ).returncode == 0
+
+
+def create_bundle(repo_path, rel_path, bundle_path, previous_refs):
+    """
+    Gera o bundle de um repositório. Executado dentro do pool de processos.
+
+    Os commits das refs do snapshot anterior que ainda existem no repositório são
+    usados como pré-requisitos, de modo que o bundle contenha apenas objetos novos.
+    Retorna a entrada do manifesto do snapshot ou None se nada mudou.
+    """
+    refs = list_refs(repo_path)
+    if not refs or refs == previous_refs:
+        return None
+
+    prerequisites = sorted({sha for sha in previous_refs.values() if has_object(repo_path, sha)})
+    result = subprocess.run(
+        ["git", "bundle", "create", "--quiet", bundle_path, "--all", "--stdin"],
+        cwd=repo_path,
+        input="".join(f"^{sha}\n" for sha in prerequisites),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        if "empty bundle" in result.stderr:
+            # Apenas refs foram movidas ou removidas; não há objetos novos.
+            return {"path": rel_path, "bundle": None, "refs": refs, "prerequisites": prerequisites}
+        raise RuntimeError(f"Erro ao gerar bundle de {rel_path}: {result.stderr.strip()}")
+
+    return {
+        "path": rel_path,
+        "bundle": None,
+        "refs": refs,
+        "prerequisites": prerequisites,
+        "size": os.path.getsize(bundle_path),
+        "sha256": sha256_file(bundle_path),
+    }
+
+
+def load_state(backup_dir):
+    path = os.path.join(backup_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {"snapshot": None, "refs": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(backup_dir, state):
+    path = os.path.join(backup_dir, STATE_FILE)
+    mkdir(os.path.dirname(path))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def export(backup_dir, dest_dir, jobs=None, full=False):
+    """
+    Gera um snapshot do diretório de backup em 'dest_dir' e retorna o caminho do arquivo.
+    """
+    manifest = Manifest(backup_dir)
+    state = {"snapshot": None, "refs": {}} if full else load_state(backup_dir)
+    paths = sorted({entry["path"] for entry in manifest.entries.values() if entry.get("path")})
+
+    # Microssegundos no nome evitam que dois snapshots do mesmo segundo se sobrescrevam.
+    name = datetime.now(timezone.utc).strftime("snapshot-%Y%m%dT%H%M%S.%fZ")
+    mkdir(dest_dir)
+    archive_path = os.path.join(dest_dir, f"{name}.tar.gz")
+    staging_dir = tempfile.mkdtemp(prefix=f"{name}-", dir=dest_dir)
+
+    entries = []
+    failures = []
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor, \
+                tarfile.open(archive_path + ".tmp", "w:gz") as archive:
+            futures = []
+            for index, rel_path in enumerate(paths):
+                repo_path = os.path.join(backup_dir, rel_path)
+                if not os.path.exists(repo_path):
+                    logging.warning(f"Repositório {rel_path} não encontrado, ignorando")
+                    continue
+                bundle_path = os.path.join(staging_dir, f"{index:06d}.bundle")
+                futures.append((rel_path, bundle_path, executor.submit(
+                    create_bundle, repo_path, rel_path, bundle_path, state["refs"].get(rel_path, {})
+                )))
+
+            # Os bundles são adicionados ao arquivo na ordem do manifesto, à medida
+            # que ficam prontos, e removidos do diretório temporário em seguida.
+            for rel_path, bundle_path, future in futures:
+                try:
+                    entry = future.result()
+                except (RuntimeError, subprocess.CalledProcessError) as e:
+                    logging.error(f"Erro ao exportar {rel_path}: {e}")
+                    failures.append(rel_path)
+                    continue
+                if entry is None:
+                    continue
+                if os.path.exists(bundle_path):
+                    entry["bundle"] = f"bundles/{entry['path']}.bundle"
+                    archive.add(bundle_path, arcname=entry["bundle"])
+                    os.remove(bundle_path)
+                    logging.info(f"Bundle de {entry['path']}: {entry['size']} bytes")
+                entries.append(entry)
+
+            snapshot = {
+                "name": name,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "base": state["snapshot"],
+                "repos": entries,
+            }
+            data = json.dumps(snapshot, indent=2, sort_keys=True).encode()
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            archive.addfile(info, io.BytesIO(data))
+
+        os.replace(archive_path + ".tmp", archive_path)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if os.path.exists(archive_path + ".tmp"):
+            os.remove(archive_path + ".tmp")
+
+    with open(archive_path + ".sha256", "w") as f:
+        f.write(f"{sha256_file(archive_path)}  {os.path.basename(archive_path)}\n")
+
+    refs = dict(state["refs"])
+    for entry in entries:
+        refs[entry["path"]] = entry["refs"]
+    save_state(backup_dir, {"snapshot": name, "refs": refs})
+
+    logging.info(
+        f"Snapshot {archive_path} criado com {sum(1 for e in entries if e['bundle'])} bundles "
+        f"(base: {state['snapshot'] or 'nenhuma'})"
+    )
+    for rel_path in failures:
+        logging.error(f"Repositório fora do snapshot: {rel_path}")
+    return archive_path
+
+
+def verify(archive_path):
+    """
+    Confere o checksum do arquivo (se houver '.sha256') e o de cada bundle listado
+    no SNAPSHOT.json. Retorna o manifesto do snapshot; lança RuntimeError se algo
+    não confere.
+    """
+    checksum_path = archive_path + ".sha256"
+    if os.path.exists(checksum_path):
+        with open(checksum_path, "r") as f:
+            expected = f.read().split()[0]
+        if sha256_file(archive_path) != expected:
+            raise RuntimeError(f"Checksum do arquivo {archive_path} não confere")
+
+    with tarfile.open(archive_path, "r:gz") as archive:
+        snapshot = json.load(archive.extractfile(MANIFEST_NAME))
+        for entry in snapshot["repos"]:
+            if not entry["bundle"]:
+                continue
+            digest = hashlib.sha256()
+            size = 0
+            with archive.extractfile(entry["bundle"]) as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+            if digest.hexdigest() != entry["sha256"] or size != entry["size"]:
+                raise RuntimeError(f"Checksum do bundle {entry['bundle']} não confere")
+
+    logging.info(f"Snapshot {snapshot['name']} verificado: {len(snapshot['repos'])} repositórios")
+    return snapshot
+
+
+def update_refs(repo_path, refs):
+    """
+    Faz as refs do repositório coincidirem exatamente com 'refs': atualiza as
+    listadas e remove as que não estão mais no snapshot.
+    """
+    current = list_refs(repo_path)
+    commands = [f"update {ref} {sha}\n" for ref, sha in sorted(refs.items()) if current.get(ref) != sha]
+    commands += [f"delete {ref}\n" for ref in sorted(current) if ref not in refs]
+    if commands:
+        subprocess.run(
+            ["git", "update-ref", "--stdin"], cwd=repo_path, input="".join(commands), text=True, check=True
+        )
+
+
+def restore(archive_path, dest_dir):
+    """
+    Verifica o snapshot e aplica cada bundle em um repositório bare em 'dest_dir'.
+
+    Depois de aplicar o bundle (se houver), as refs do repositório são ajustadas
+    às do snapshot, o que também restaura mudanças que só movem, criam ou removem
+    refs sem trazer objetos novos.
+    """
+    snapshot = verify(archive_path)
+    mkdir(dest_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir, tarfile.open(archive_path, "r:gz") as archive:
+        for entry in snapshot["repos"]:
+            repo_path = os.path.join(dest_dir, entry["path"])
+            if not os.path.exists(repo_path):
+                if entry["prerequisites"] or not entry["bundle"]:
+                    raise RuntimeError(
+                        f"{entry['path']} depende do snapshot {snapshot['base']}; restaure-o primeiro"
+                    )
+                subprocess.run(["git", "init", "--bare", "--quiet", repo_path], check=True)
+
+            if entry["bundle"]:
+                bundle_path = os.path.join(tmp_dir, "repo.bundle")
+                with archive.extractfile(entry["bundle"]) as src, open(bundle_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+                subprocess.run(["git", "bundle", "verify", "--quiet", bundle_path], cwd=repo_path, check=True)
+                subprocess.run(
+                    ["git", "fetch", "--quiet", "--update-head-ok", bundle_path, "+refs/*:refs/*"],
+                    cwd=repo_path,
+                    check=True
+                )
+                os.remove(bundle_path)
+
+            update_refs(repo_path, entry["refs"])
+            logging.info(f"Repositório {entry['path']} restaurado")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots verificáveis do diretório de backup")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Gera um snapshot incremental do backup")
+    export_parser.add_argument("directory", metavar="DIRECTORY", help="Diretório do backup")
+    export_parser.add_argument("dest", metavar="DEST", help="Diretório onde o snapshot será gravado")
+    export_parser.add_argument("-j", "--jobs", type=int,
+                               help="Processos usados para gerar os bundles (padrão: número de CPUs)")
+    export_parser.add_argument("--full", action="store_true",
+                               help="Ignora o snapshot anterior e gera bundles completos")
+
+    restore_parser = subparsers.add_parser("restore", help="Verifica e restaura um snapshot")
+    restore_parser.add_argument("archive", metavar="ARCHIVE", help="Arquivo do snapshot (.tar.gz)")
+    restore_parser.add_argument("dest", metavar="DEST", nargs="?", help="Diretório de destino")
+    restore_parser.add_argument("--verify-only", action="store_true",
+                                help="Apenas confere os checksums, sem restaurar")
+    args = parser.parse_args()
+
+    if args.command == "restore" and not args.verify_only and not args.dest:
+        parser.error("DEST é obrigatório para restaurar")
+
+    try:
+        if args.command == "export":
+            export(os.path.expanduser(args.directory), os.path.expanduser(args.dest), args.jobs, args.full)
+        elif args.verify_only:
+            verify(os.path.expanduser(args.archive))
+        else:
+            restore(os.path.expanduser(args.archive), os.path.expanduser(args.dest))
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        logging.error(e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
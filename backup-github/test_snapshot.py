@@ -0,0 +1,84 @@
+"""
+Testes da exportação e restauração de snapshots com repositórios locais.
+
+Exemplo:
+    python -m unittest test_snapshot
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+import snapshot
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@localhost",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@localhost",
+}
+
+
+def git(args, cwd):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, env={**os.environ, **GIT_ENV}, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.backup_dir = os.path.join(self.tmp_dir, "backup")
+        self.dest_dir = os.path.join(self.tmp_dir, "snapshots")
+        self.restore_dir = os.path.join(self.tmp_dir, "restore")
+
+        work_dir = os.path.join(self.tmp_dir, "work")
+        git(["init", "--quiet", "-b", "main", work_dir], self.tmp_dir)
+        for name in ("a", "b"):
+            with open(os.path.join(work_dir, name), "w") as f:
+                f.write(name)
+            git(["add", name], work_dir)
+            git(["commit", "--quiet", "-m", name], work_dir)
+
+        self.repo_path = os.path.join(self.backup_dir, "owner", "repo.git")
+        git(["clone", "--quiet", "--mirror", work_dir, self.repo_path], self.tmp_dir)
+        with open(os.path.join(self.backup_dir, ".manifest.json"), "w") as f:
+            json.dump({"1": {"full_name": "owner/repo", "path": "owner/repo.git"}}, f)
+
+    def test_restore_ref_only_changes(self):
+        first = snapshot.export(self.backup_dir, self.dest_dir, jobs=1)
+
+        head = git(["rev-parse", "main"], self.repo_path)
+        parent = git(["rev-parse", "main~1"], self.repo_path)
+        git(["update-ref", "refs/heads/other", head], self.repo_path)
+        git(["tag", "v1", head], self.repo_path)
+        git(["update-ref", "refs/heads/main", parent], self.repo_path)
+        second = snapshot.export(self.backup_dir, self.dest_dir, jobs=1)
+
+        self.assertIsNone(snapshot.verify(second)["repos"][0]["bundle"])
+
+        snapshot.restore(first, self.restore_dir)
+        snapshot.restore(second, self.restore_dir)
+        restored = os.path.join(self.restore_dir, "owner", "repo.git")
+        self.assertEqual(snapshot.list_refs(restored), snapshot.list_refs(self.repo_path))
+
+    def test_restore_deleted_ref(self):
+        head = git(["rev-parse", "main"], self.repo_path)
+        git(["update-ref", "refs/heads/other", head], self.repo_path)
+        first = snapshot.export(self.backup_dir, self.dest_dir, jobs=1)
+
+        git(["update-ref", "-d", "refs/heads/other"], self.repo_path)
+        second = snapshot.export(self.backup_dir, self.dest_dir, jobs=1)
+
+        snapshot.restore(first, self.restore_dir)
+        snapshot.restore(second, self.restore_dir)
+        restored = os.path.join(self.restore_dir, "owner", "repo.git")
+        self.assertNotIn("refs/heads/other", snapshot.list_refs(restored))
+        self.assertEqual(snapshot.list_refs(restored), snapshot.list_refs(self.repo_path))
+
+
+if __name__ == "__main__":
+    unittest.main()